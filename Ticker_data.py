@@ -1,8 +1,13 @@
-from dcf import dcf
+from valuation_cache import cached_dcf, free_cash_flow_history
 import streamlit as st
 import fmp_client as yf
+import pandas as pd
 import logging
-import math
+from table_renderer import render_metric_table
+from derived_metrics import cached_derived_metrics, format_derived_metrics
+from fundamentals_panel import panel_row, panel_from_rows
+from valuation_models import evaluate_models
+from ratio_store import ensure_ratios
 
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -13,14 +18,28 @@ st.title("Ticker data")
 st.sidebar.title("DCF Config")
 
 
-def format_table_row(metric, value, is_positive):
-    color = "green" if is_positive else "red" if is_positive is not None else "black"
-    return f"<tr><td>{metric}</td><td style='color:{color}; font-weight:bold;'>{value}</td></tr>"
+# Green / red ranges per metric for the metric tables (see table_renderer.render_metric_table)
+INFO_THRESHOLDS = {
+    'trailingPE': {'green': [(10, 20, 'both')], 'red': [(None, 5), (30, None)]},
+    'trailingPegRatio': {'green': [(None, 1)], 'red': [(2, None)], 'format': 'ratio'},
+    'priceToSalesTrailing12Months': {'green': [(None, 1)], 'red': [(2, None)], 'format': 'ratio'},
+    'operatingMargins': {'green': [(0.20, None)], 'red': [(None, 0.10)], 'format': 'percent'},
+    'earningsQuarterlyGrowth': {'green': [(0, None)]},
+}
 
+STATEMENT_THRESHOLDS = {
+    'Gross Profit': {'green': [(0, None)]},
+    'Sales Growth 1Y': {'format': 'percent'},
+    'Sales Growth 3Y': {'format': 'percent'},
+    'Operating Margin': {'format': 'percent'},
+}
 
-# Helper function to handle NaN values
-def safe_round(value):
-    return round(value) if value and not math.isnan(value) else None
+
+def latest(statement):
+    """Most recent period of a statement as a metric -> value Series"""
+    if statement.empty:
+        return pd.Series(dtype=object)
+    return statement.iloc[:, 0]
 
 
 # Required Rate slider
@@ -90,6 +109,10 @@ if ticker:
     balance_sheet = stock.balance_sheet
     financials = stock.financials
     cashflow = stock.cashflow
+    derived = cached_derived_metrics(ticker.upper(), info.get('marketCap'), balance_sheet, financials, cashflow)
+
+    # Keep the Key Metrics ratio table in step with newly published statements
+    ensure_ratios(stock)
 
     st.subheader(f":coffee: {info.get('longName', ticker)}")
 
@@ -98,31 +121,14 @@ if ticker:
 # INFO #######################################################################
     st.subheader(":sparkles: Info Metrics")
 
-    # Create Info table structure
-    table_header = """
-    <table style="width:100%; border-collapse:collapse;">
-    <thead>
-    <tr style="border-bottom:2px solid black;">
-    <th style="text-align:left;">Metric</th>
-    <th style="text-align:left;">Value</th>
-    </tr>
-    </thead>
-    <tbody>
-    """
-
-    table_rows = []
     info_dict = info
 
     # DCF
     try:
-        free_cash_flow_data = cashflow.loc['Free Cash Flow'].tail(4)
-        free_cash_flow = [
-            safe_round(item) for item in free_cash_flow_data if item is not None
-        ]
-        free_cash_flow.reverse()
+        free_cash_flow = free_cash_flow_history(cashflow)
         shares = info.get('sharesOutstanding', 0)
         if len(free_cash_flow) > 0 and shares > 0:
-            info_dict['dcf'] = dcf(free_cash_flow, shares)
+            info_dict['dcf'] = cached_dcf(ticker.upper(), cashflow, shares)
         else:
             logging.warning(f"DCF calculation skipped: free_cash_flow={len(free_cash_flow)} items, shares={shares}")
             info_dict['dcf'] = 0
@@ -130,49 +136,18 @@ if ticker:
         logging.warning(f"Free Cash Flow data not available for {ticker}. Error: {e}")
         info_dict['dcf'] = 0
 
-    # Iterate over metrics and populate the table
-    for metric in list(info_dict.keys()):
-        # Skip description - will be shown separately
-        if metric == "description":
-            continue
-
-        value = info_dict.get(metric, 0)
-        if value is None:
-            value = 0
-
-        # Add positivity/negativity logic for specific metrics
-        if metric == "trailingPE" and (10 <= value <= 20):
-            table_rows.append(format_table_row(metric, value, True))
-        elif metric == "trailingPE" and (value < 5 or value > 30):
-            table_rows.append(format_table_row(metric, value, False))
-        elif metric == "trailingPegRatio" and value < 1:
-            table_rows.append(format_table_row(metric, f"{value:.2f}", True))
-        elif metric == "trailingPegRatio" and value > 2:
-            table_rows.append(format_table_row(metric, f"{value:.2f}", False))
-        elif metric == "priceToSalesTrailing12Months" and value < 1:
-            table_rows.append(format_table_row(metric, f"{value:.2f}", True))
-        elif metric == "priceToSalesTrailing12Months" and value > 2:
-            table_rows.append(format_table_row(metric, f"{value:.2f}", False))
-        elif metric == "operatingMargins" and value > 0.20:
-            table_rows.append(format_table_row(metric, f"{value * 100:.2f}%", True))
-        elif metric == "operatingMargins" and value < 0.10:
-            table_rows.append(format_table_row(metric, f"{value * 100:.2f}%", False))
-        elif metric == "dcf" and value > info.get('currentPrice', 0):
-            table_rows.append(format_table_row(metric, value, True))
-        elif metric == "dcf" and value < info.get('currentPrice', float('inf')):
-            table_rows.append(format_table_row(metric, value, False))
-        elif metric == "earningsQuarterlyGrowth" and value > 0:
-            table_rows.append(format_table_row(metric, value, True))
-        else:
-            # Default handling for metrics without specific thresholds
-            value_formatted = f"${value:,}" if isinstance(value, (int, float)) and value > 1e3 else str(value)
-            table_rows.append(format_table_row(metric, value_formatted, is_positive=None))
-
-    # Close table structure
-    table_footer = "</tbody></table>"
+    # DCF is good when above the current price
+    current_price = info.get('currentPrice', 0) or 0
+    info_thresholds = {
+        **INFO_THRESHOLDS,
+        'dcf': {'green': [(current_price, None)], 'red': [(None, current_price)]},
+    }
 
-    # Display the table
-    st.markdown(table_header + "".join(table_rows) + table_footer, unsafe_allow_html=True)
+    # Description is shown separately
+    st.markdown(
+        render_metric_table(pd.Series(info_dict, dtype=object), info_thresholds, skip=['description']),
+        unsafe_allow_html=True,
+    )
 
     # Display description in collapsible section
     description = info.get('description', '')
@@ -182,156 +157,62 @@ if ticker:
 
     st.divider()
 
+# Alternative valuations #######################################################################
+    st.subheader(":sparkles: Valuation Models")
+
+    valuations = evaluate_models(panel_from_rows([panel_row(stock)]))
+    if valuations.empty:
+        st.write("Not enough data to run the valuation models.")
+    else:
+        valuation = valuations.iloc[0]
+        implied = valuation.pop('Implied Growth')
+        st.markdown(
+            render_metric_table(valuation.dropna().round(2), {
+                model: {'green': [(current_price, None)], 'red': [(None, current_price)]} for model in valuation.index
+            }),
+            unsafe_allow_html=True,
+        )
+        if pd.notna(implied):
+            st.caption(f"Reverse DCF: the current price implies {implied:.2%} annual free cash flow growth.")
 
-# Balance Sheet #######################################################################
-    st.subheader(":sparkles: Balance Sheet Metrics")
+    st.divider()
 
-    # Create Info table structure
-    table_header = """
-    <table style="width:100%; border-collapse:collapse;">
-    <thead>
-    <tr style="border-bottom:2px solid black;">
-    <th style="text-align:left;">Metric</th>
-    <th style="text-align:left;">Value</th>
-    </tr>
-    </thead>
-    <tbody>
-    """
-
-    table_rows = []
-
-    # Iterate over metrics and populate the table
-    for metric in balance_sheet.index.tolist():
-        try:
-            value = balance_sheet.loc[metric].iloc[0]
-            if value is None:
-                value = 0
-        except KeyError:
-            value = 0
-
-        # Add positivity/negativity logic for specific metrics
-        if metric == "trailingPE" and (10 <= value <= 20):
-            table_rows.append(format_table_row(metric, value, True))
-        elif metric == "trailingPE" and (value < 5 or value > 30):
-            table_rows.append(format_table_row(metric, value, False))
-        else:
-            # Default handling for metrics without specific thresholds
-            value_formatted = f"${value:,}" if isinstance(value, (int, float)) and value > 1e3 else str(value)
-            table_rows.append(format_table_row(metric, value_formatted, is_positive=None))
 
-    # Close table structure
-    table_footer = "</tbody></table>"
+# Balance Sheet #######################################################################
+    st.subheader(":sparkles: Balance Sheet Metrics")
 
-    # Display the table
-    st.markdown(table_header + "".join(table_rows) + table_footer, unsafe_allow_html=True)
+    st.markdown(render_metric_table(latest(balance_sheet), STATEMENT_THRESHOLDS), unsafe_allow_html=True)
 
     st.divider()
 
 # Financials #######################################################################
     st.subheader(":sparkles: Financials Metrics")
 
-    # Create Info table structure
-    table_header = """
-    <table style="width:100%; border-collapse:collapse;">
-    <thead>
-    <tr style="border-bottom:2px solid black;">
-    <th style="text-align:left;">Metric</th>
-    <th style="text-align:left;">Value</th>
-    </tr>
-    </thead>
-    <tbody>
-    """
-    table_rows = []
-    try:
-        sales_growth_1y = (financials.loc['Total Revenue'].iloc[0] / financials.loc['Total Revenue'].iloc[1] - 1) * 100
-        sales_growth_3y = (financials.loc['Total Revenue'].iloc[0] / financials.loc['Total Revenue'].iloc[3] - 1) * 100
-    except KeyError:
-        sales_growth_1y = sales_growth_3y = 0
-
-    try:
-        operating_margin = (financials.loc['Operating Income'].iloc[0] / financials.loc['Total Revenue'].iloc[0]) * 100
-    except KeyError:
-        operating_margin = 0
-
-    calculated_metrics = {
-        'Sales Growth 1Y': f'{sales_growth_1y:.2f}%',
-        'Sales Growth 3Y': f'{sales_growth_3y:.2f}%',
-        'Operating Margin': f'{operating_margin:.2f}%',
-    }
-
-    # Iterate over metrics and populate the table
-    for metric in financials.index.tolist():
-        try:
-            value = financials.loc[metric].iloc[0]
-            if value is None:
-                value = 0
-        except KeyError:
-            value = 0
-
-        # Add positivity/negativity logic for specific metrics
-        if metric == "trailingPE" and (10 <= value <= 20):
-            table_rows.append(format_table_row(metric, value, True))
-        elif metric == "trailingPE" and (value < 5 or value > 30):
-            table_rows.append(format_table_row(metric, value, False))
-        elif metric == "Gross Profit" and value > 0:
-            table_rows.append(format_table_row(metric, value, True))
-        else:
-            # Default handling for metrics without specific thresholds
-            value_formatted = f"${value:,}" if isinstance(value, (int, float)) and value > 1e3 else str(value)
-            table_rows.append(format_table_row(metric, value_formatted, is_positive=None))
+    calculated_metrics = pd.Series(dtype=object)
+    if not derived.empty:
+        calculated_metrics = derived.loc[['Sales Growth 1Y', 'Sales Growth 3Y', 'Operating Margin']].iloc[:, 0].dropna()
 
-    # Add the calculated metrics to the table rows
-    for metric, value in calculated_metrics.items():
-        table_rows.append(format_table_row(metric, value, is_positive=None))
-
-    # Close table structure
-    table_footer = "</tbody></table>"
-
-    # Display the table
-    st.markdown(table_header + "".join(table_rows) + table_footer, unsafe_allow_html=True)
+    # Add the calculated metrics after the statement rows
+    st.markdown(
+        render_metric_table(pd.concat([latest(financials), calculated_metrics]), STATEMENT_THRESHOLDS),
+        unsafe_allow_html=True,
+    )
 
     st.divider()
 
 # CashFlow
     st.subheader(":sparkles: CashFlow Metrics")
 
-    # Create Info table structure
-    table_header = """
-    <table style="width:100%; border-collapse:collapse;">
-    <thead>
-    <tr style="border-bottom:2px solid black;">
-    <th style="text-align:left;">Metric</th>
-    <th style="text-align:left;">Value</th>
-    </tr>
-    </thead>
-    <tbody>
-    """
-
-    table_rows = []
-
-    # Iterate over metrics and populate the table
-    for metric in cashflow.index.tolist():
-        try:
-            value = cashflow.loc[metric].iloc[0]
-            if value is None:
-                value = 0
-        except KeyError:
-            value = 0
-
-        # Add positivity/negativity logic for specific metrics
-        if metric == "trailingPE" and (10 <= value <= 20):
-            table_rows.append(format_table_row(metric, value, True))
-        elif metric == "trailingPE" and (value < 5 or value > 30):
-            table_rows.append(format_table_row(metric, value, False))
-        else:
-            # Default handling for metrics without specific thresholds
-            value_formatted = f"${value:,}" if isinstance(value, (int, float)) and value > 1e3 else str(value)
-            table_rows.append(format_table_row(metric, value_formatted, is_positive=None))
+    st.markdown(render_metric_table(latest(cashflow), STATEMENT_THRESHOLDS), unsafe_allow_html=True)
+
+    st.divider()
 
-    # Close table structure
-    table_footer = "</tbody></table>"
+# Multi-period comparison #######################################################################
+    st.subheader(":sparkles: Multi-period Comparison")
 
-    # Display the table
-    st.markdown(table_header + "".join(table_rows) + table_footer, unsafe_allow_html=True)
+    if derived.empty:
+        st.write("No statement data to compare.")
+    else:
+        st.dataframe(format_derived_metrics(derived), use_container_width=True)
 
     st.divider()
\ No newline at end of file
@@ -0,0 +1,309 @@
+import os
+import sys
+import json
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import pandas as pd
+import requests
+import fmp_client as yf
+from db import (
+    create_db, get_all_stocks_from_db, add_alert_rule, get_alert_rules,
+    get_alert_state, save_alert_state, save_alerts,
+)
+from derived_metrics import compute_derived_metrics
+from indicators import technical_indicators
+from dcf import dcf
+from valuation_cache import free_cash_flow_history
+
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+ALERTS_WEBHOOK_URL = os.environ.get('ALERTS_WEBHOOK_URL')
+WEBHOOK_TIMEOUT = 10
+MAX_WORKERS = 8
+
+# Required, perpetual and growth rates used for the price vs DCF rule (the sidebar defaults)
+ALERT_RATES = (0.06, 0.02, 0.03)
+
+# Seeded when no rule exists; '*' applies a rule to every watchlist ticker
+DEFAULT_RULES = [
+    ('*', 'price_vs_dcf', {'direction': 'below'}),
+    ('*', 'price_vs_dcf', {'direction': 'above'}),
+    ('*', 'rsi', {'direction': 'below', 'level': 30}),
+    ('*', 'rsi', {'direction': 'above', 'level': 70}),
+    ('*', 'ma_cross', {'direction': 'above'}),
+    ('*', 'ma_cross', {'direction': 'below'}),
+    ('*', 'metric_change', {'metric': 'Operating Margin', 'min_change': 0.05}),
+]
+
+# Parameters a rule can have, missing ones are NaN
+RULE_PARAMS = ['direction', 'level', 'margin', 'metric', 'min_change']
+
+# Per-ticker values the rules compare, missing ones are NaN
+SNAPSHOT_COLUMNS = [
+    'ticker', 'close', 'prev_close', 'rsi', 'prev_rsi',
+    'ma_50', 'prev_ma_50', 'ma_200', 'prev_ma_200', 'fair_value',
+]
+
+create_db()
+
+
+# Change detection ###########################################################
+
+def _fingerprint(*frames):
+    digest = hashlib.sha1()
+    for frame in frames:
+        digest.update(frame.to_csv().encode())
+    return digest.hexdigest()
+
+
+def load_ticker(ticker):
+    """
+    Fetch the data the rules look at and fingerprint each source.
+
+    Prices are fingerprinted by their last bar, statements by their latest period (so restatements count too).
+
+    :return: (stock, prices, statements, {(ticker, source): fingerprint}).
+    """
+    stock = yf.Ticker(ticker)
+    prices = stock.history(period='1y')
+    statements = {
+        'balance_sheet': stock.balance_sheet,
+        'financials': stock.financials,
+        'cashflow': stock.cashflow,
+    }
+    fingerprints = {
+        (stock.ticker, 'prices'): _fingerprint(prices.tail(1)),
+        (stock.ticker, 'statements'): _fingerprint(*(s.iloc[:, :1] for s in statements.values() if not s.empty)),
+    }
+    return stock, prices, statements, fingerprints
+
+
+def ticker_values(stock, prices, statements):
+    """
+    Values the rules compare: last two bars of close, RSI and 50/200 MAs, DCF fair value,
+    and every derived metric for the two latest statement periods.
+
+    :return: (dict of snapshot values, DataFrame of metric, value, prev_value).
+    """
+    values = {'ticker': stock.ticker}
+
+    if len(prices) >= 2:
+        indicators = technical_indicators(prices)
+        last, prev = indicators.iloc[-1], indicators.iloc[-2]
+        values.update({
+            'close': last['Close'], 'prev_close': prev['Close'],
+            'rsi': last['RSI'], 'prev_rsi': prev['RSI'],
+            'ma_50': last['50_MA'], 'prev_ma_50': prev['50_MA'],
+            'ma_200': last['200_MA'], 'prev_ma_200': prev['200_MA'],
+        })
+
+    # Not persisted: the valuations table keeps the user's last slider-rate valuation.
+    # A failed DCF only leaves fair_value NaN; the other rule types still run and the state is saved
+    try:
+        values['fair_value'] = dcf(
+            free_cash_flow_history(statements['cashflow']), stock.info['sharesOutstanding'], ALERT_RATES
+        )
+    except Exception as e:
+        logging.warning(f"No DCF for {stock.ticker}: {e}")
+
+    metrics = compute_derived_metrics(**statements)
+    if metrics.shape[1] >= 2:
+        changes = pd.DataFrame({'value': metrics.iloc[:, 0], 'prev_value': metrics.iloc[:, 1]})
+    else:
+        changes = pd.DataFrame(columns=['value', 'prev_value'], dtype=float)
+    changes = changes.rename_axis('metric').reset_index()
+    changes['ticker'] = stock.ticker
+    return values, changes
+
+
+# Rules ######################################################################
+
+def _crossed(prev_gap, gap, direction):
+    """Rows where a gap (value - level) changed sign in the rule's direction"""
+    above = (prev_gap <= 0) & (gap > 0)
+    below = (prev_gap >= 0) & (gap < 0)
+    return above.where(direction == 'above', below)
+
+
+def _price_vs_dcf(rules):
+    level = rules['fair_value'] * (1 - rules['margin'].fillna(0))
+    return _crossed(rules['prev_close'] - level, rules['close'] - level, rules['direction'])
+
+
+def _rsi(rules):
+    return _crossed(rules['prev_rsi'] - rules['level'], rules['rsi'] - rules['level'], rules['direction'])
+
+
+def _ma_cross(rules):
+    return _crossed(rules['prev_ma_50'] - rules['prev_ma_200'], rules['ma_50'] - rules['ma_200'], rules['direction'])
+
+
+def _metric_change(rules):
+    return (rules['value'] - rules['prev_value']).abs() >= rules['min_change']
+
+
+# Rule type -> (data source it depends on, vectorized check, message template)
+RULE_TYPES = {
+    'price_vs_dcf': ('prices', _price_vs_dcf, "{ticker} closed {direction} its DCF fair value ({close:.2f} vs {fair_value:.2f})"),
+    'rsi': ('prices', _rsi, "{ticker} RSI crossed {direction} {level:g} ({rsi:.1f})"),
+    'ma_cross': ('prices', _ma_cross, "{ticker} 50-day MA crossed {direction} the 200-day MA ({ma_50:.2f} vs {ma_200:.2f})"),
+    'metric_change': ('statements', _metric_change, "{ticker} {metric} changed from {prev_value:.4g} to {value:.4g}"),
+}
+
+
+def add_rule(ticker, rule_type, **params):
+    """Store an alert rule for a ticker, or for every watchlist ticker with ticker='*'"""
+    if rule_type not in RULE_TYPES:
+        raise ValueError(f"Unknown rule type {rule_type}, expected one of {', '.join(RULE_TYPES)}")
+    add_alert_rule(ticker.upper(), rule_type, json.dumps(params))
+
+
+def load_rules():
+    """All rules as a DataFrame (rule_id, ticker, rule_type, one column per parameter)"""
+    rows = get_alert_rules()
+    if not rows:
+        for ticker, rule_type, params in DEFAULT_RULES:
+            add_rule(ticker, rule_type, **params)
+        rows = get_alert_rules()
+
+    rules = pd.DataFrame(rows, columns=['rule_id', 'ticker', 'rule_type', 'params'])
+    params = pd.DataFrame([json.loads(p) for p in rules.pop('params')], index=rules.index)
+    return rules.join(params.reindex(columns=RULE_PARAMS))
+
+
+def evaluate_rules(rules, snapshot, changes, changed):
+    """
+    Evaluate every rule that depends on a changed source, one vectorized pass per rule type.
+
+    :param rules: Rules as returned by load_rules().
+    :param snapshot: Snapshot values, one row per ticker (see ticker_values()).
+    :param changes: Derived metric changes, one row per (ticker, metric).
+    :param changed: Set of (ticker, source) whose data changed.
+    :return: DataFrame of fired alerts (ticker, rule_id, rule_type, message).
+    """
+    tickers = pd.DataFrame({'ticker': snapshot['ticker']})
+    expanded = pd.concat([
+        rules[rules['ticker'] == '*'].drop(columns='ticker').merge(tickers, how='cross'),
+        rules[rules['ticker'].isin(tickers['ticker'])],
+    ], ignore_index=True)
+
+    alerts = []
+    for rule_type, (source, check, template) in RULE_TYPES.items():
+        group = expanded[expanded['rule_type'] == rule_type]
+        group = group[[(ticker, source) in changed for ticker in group['ticker']]]
+        if group.empty:
+            continue
+
+        group = group.merge(snapshot, on='ticker', how='left')
+        if rule_type == 'metric_change':
+            group = group.merge(changes, on=['ticker', 'metric'], how='left')
+
+        fired = group[check(group).fillna(False).astype(bool)]
+        messages = [template.format_map(row) for row in fired.to_dict(orient='records')]
+        alerts.append(fired[['ticker', 'rule_id', 'rule_type']].assign(message=messages))
+
+    columns = ['ticker', 'rule_id', 'rule_type', 'message']
+    return pd.concat(alerts, ignore_index=True) if alerts else pd.DataFrame(columns=columns)
+
+
+# Delivery ###################################################################
+
+def post_webhook(alerts, url=ALERTS_WEBHOOK_URL):
+    """POST the alerts as JSON ({'alerts': [...]}); failures are logged, alerts stay in the table"""
+    if not url or alerts.empty:
+        return
+    try:
+        response = requests.post(url, json={'alerts': alerts.to_dict(orient='records')}, timeout=WEBHOOK_TIMEOUT)
+        response.raise_for_status()
+    except requests.RequestException as e:
+        logging.error(f"Alerts webhook failed: {e}")
+
+
+def refresh(tickers=None):
+    """
+    Check the tickers for new data and evaluate the rules of the ones that changed.
+
+    Unchanged tickers cost one cached fetch and a fingerprint, no rule is evaluated for them.
+    Tickers that fail keep their previous fingerprint, so they are evaluated on the next run.
+
+    :param tickers: Tickers to check, defaults to the watchlist.
+    :return: DataFrame of the alerts fired (ticker, rule_id, rule_type, message).
+    """
+    tickers = tickers or [stock[0] for stock in get_all_stocks_from_db()]
+    rules = load_rules()
+    state = get_alert_state()
+
+    def check(ticker):
+        try:
+            stock, prices, statements, fingerprints = load_ticker(ticker)
+            changed = {key for key, fingerprint in fingerprints.items() if state.get(key) != fingerprint}
+            if not changed:
+                return None
+            return fingerprints, changed, *ticker_values(stock, prices, statements)
+        except Exception as e:
+            logging.error(f"Alerts: error checking {ticker}: {e}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        results = [result for result in executor.map(check, tickers) if result]
+
+    logging.info(f"Alerts: {len(results)} of {len(tickers)} tickers changed")
+    if not results:
+        return pd.DataFrame(columns=['ticker', 'rule_id', 'rule_type', 'message'])
+
+    fingerprints = {key: value for result in results for key, value in result[0].items()}
+    changed = set().union(*(result[1] for result in results))
+    snapshot = pd.DataFrame([result[2] for result in results]).reindex(columns=SNAPSHOT_COLUMNS)
+    changes = pd.concat([result[3] for result in results], ignore_index=True)
+
+    alerts = evaluate_rules(rules, snapshot, changes, changed)
+    if not alerts.empty:
+        save_alerts(list(alerts[['ticker', 'rule_id', 'message']].itertuples(index=False, name=None)))
+        post_webhook(alerts)
+    save_alert_state(fingerprints)
+
+    logging.info(f"Alerts: {len(alerts)} fired")
+    return alerts
+
+
+# Local webhook stand-in #####################################################
+
+class WebhookReceiver(BaseHTTPRequestHandler):
+    """Logs every alert POSTed to it, in place of a real webhook"""
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        for alert in body.get('alerts', []):
+            logging.info(f"Webhook received: {alert['message']}")
+        self.send_response(204)
+        self.end_headers()
+
+
+def _param_value(value):
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+if __name__ == '__main__':
+    # python alerts.py run [TICKER ...]                 (e.g. from cron after the data refresh)
+    # python alerts.py add TICKER|'*' TYPE key=value ...
+    # python alerts.py receive [PORT]
+    command = sys.argv[1] if len(sys.argv) > 1 else 'run'
+    if command == 'run':
+        alerts = refresh(sys.argv[2:])
+        for message in alerts['message']:
+            print(message)
+    elif command == 'add' and len(sys.argv) >= 4:
+        params = dict(arg.split('=', 1) for arg in sys.argv[4:])
+        add_rule(sys.argv[2], sys.argv[3], **{k: _param_value(v) for k, v in params.items()})
+    elif command == 'receive':
+        port = int(sys.argv[2]) if len(sys.argv) > 2 else 8765
+        logging.info(f"Listening for alerts on http://localhost:{port}/")
+        HTTPServer(('localhost', port), WebhookReceiver).serve_forever()
+    else:
+        sys.exit("Usage: python alerts.py [run [TICKER ...] | add TICKER TYPE key=value ... | receive [PORT]]")
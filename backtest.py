@@ -0,0 +1,174 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from dcf import dcf_batch
+
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Assumed filing lag when a statement has no filing date
+DEFAULT_FILING_LAG = pd.DateOffset(days=90)
+
+# How far a forward price may be from the target date and still count
+PRICE_TOLERANCE = pd.Timedelta(days=7)
+
+
+def statement_history(stock):
+    """
+    Point-in-time FCF and share count per fiscal period for one FMPTicker.
+
+    :return: DataFrame with ticker, period_end, filed, free_cash_flow, shares.
+    """
+    cashflow, financials = stock.cashflow, stock.financials
+    if cashflow.empty or financials.empty or 'Free Cash Flow' not in cashflow.index:
+        return pd.DataFrame(columns=['ticker', 'period_end', 'filed', 'free_cash_flow', 'shares'])
+
+    cashflow = cashflow.T
+    history = pd.DataFrame({
+        'ticker': stock.ticker,
+        'period_end': pd.to_datetime(cashflow.index),
+        'free_cash_flow': pd.to_numeric(cashflow['Free Cash Flow'].to_numpy(), errors='coerce'),
+    })
+
+    # FMP renamed fillingDate to filingDate in the stable API
+    filed = next((cashflow[c] for c in ('filingDate', 'fillingDate') if c in cashflow), None)
+    history['filed'] = (
+        pd.to_datetime(filed.to_numpy(), errors='coerce') if filed is not None else pd.NaT
+    )
+    history['filed'] = history['filed'].fillna(history['period_end'] + DEFAULT_FILING_LAG)
+
+    shares_field = next((f for f in ('weightedAverageShsOutDil', 'weightedAverageShsOut') if f in financials.index), None)
+    shares = pd.to_numeric(financials.loc[shares_field], errors='coerce') if shares_field else pd.Series(dtype=float)
+    shares.index = pd.to_datetime(shares.index)
+    history['shares'] = shares.reindex(history['period_end']).to_numpy()
+
+    return history.dropna(subset=['free_cash_flow', 'shares'])
+
+
+def price_history(stock):
+    """Daily closes for one FMPTicker as a long DataFrame (ticker, date, close)"""
+    df = stock.history(period='max')
+    return pd.DataFrame({'ticker': stock.ticker, 'date': df.index, 'close': df['Close'].to_numpy()})
+
+
+def load_data(tickers, max_workers=8):
+    """Statement and price history for many tickers (served from the response cache when warm)"""
+    # Imported here so compute workers running sweep_rates() do not set up the response cache
+    import fmp_client as yf
+
+    def load(ticker):
+        stock = yf.Ticker(ticker)
+        return statement_history(stock), price_history(stock)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(load, tickers))
+
+    statements = pd.concat([r[0] for r in results], ignore_index=True) if results else pd.DataFrame()
+    prices = pd.concat([r[1] for r in results], ignore_index=True) if results else pd.DataFrame()
+    return statements, prices
+
+
+def build_grid(statements, prices, dates, horizon=pd.DateOffset(years=1)):
+    """
+    Date x ticker grid with the inputs known at each date and the forward return that followed.
+
+    Only statements filed strictly before a date are used for it.
+
+    :param statements: Output of statement_history / load_data.
+    :param prices: Output of price_history / load_data.
+    :param dates: Evaluation dates.
+    :param horizon: Forward return horizon.
+    :return: DataFrame with date, ticker, free_cash_flow, shares, price, forward_price, forward_return.
+    """
+    tickers = statements['ticker'].unique()
+    grid = pd.MultiIndex.from_product(
+        [pd.DatetimeIndex(dates), tickers], names=['date', 'ticker']
+    ).to_frame(index=False)
+    grid['forward_date'] = grid['date'] + horizon
+
+    prices = prices.sort_values('date')
+    grid = pd.merge_asof(
+        grid.sort_values('date'),
+        statements.sort_values('filed')[['ticker', 'filed', 'free_cash_flow', 'shares']],
+        left_on='date', right_on='filed', by='ticker', allow_exact_matches=False,
+    )
+    grid = pd.merge_asof(
+        grid, prices.rename(columns={'close': 'price'}),
+        on='date', by='ticker', tolerance=PRICE_TOLERANCE,
+    )
+    grid = pd.merge_asof(
+        grid.sort_values('forward_date'),
+        prices.rename(columns={'date': 'forward_date', 'close': 'forward_price'}),
+        on='forward_date', by='ticker', tolerance=PRICE_TOLERANCE,
+    )
+
+    grid['forward_return'] = grid['forward_price'] / grid['price'] - 1
+    grid = grid.dropna(subset=['free_cash_flow', 'shares', 'price', 'forward_return'])
+    return grid.sort_values(['date', 'ticker']).reset_index(drop=True)
+
+
+def _signal_stats(upside, forward_return):
+    """Stats for one or many signal columns (upside: rows x combos, forward_return: rows)"""
+    upside = pd.DataFrame(upside).reset_index(drop=True)
+    forward_return = pd.Series(np.asarray(forward_return, dtype=float))
+    values = upside.to_numpy()
+    returns = forward_return.to_numpy()[:, None]
+
+    # NaN upside (no valid DCF for those rates) counts as neither under- nor overvalued
+    valid = ~np.isnan(values)
+    undervalued = values > 0
+    overvalued = values <= 0
+    observations = valid.sum(axis=0)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        under_return = np.nansum(np.where(undervalued, returns, 0), axis=0) / undervalued.sum(axis=0)
+        over_return = np.nansum(np.where(overvalued, returns, 0), axis=0) / overvalued.sum(axis=0)
+        hit_rate = (valid & (undervalued == (returns > 0))).sum(axis=0) / observations
+
+    return pd.DataFrame({
+        # Rank correlation between DCF upside and what the stock did next
+        'rank_ic': upside.rank().corrwith(forward_return.rank()).to_numpy(),
+        'hit_rate': hit_rate,
+        'undervalued_return': under_return,
+        'overvalued_return': over_return,
+        'spread': under_return - over_return,
+        'observations': observations,
+    }, index=upside.columns)
+
+
+def run_backtest(grid, rates):
+    """
+    Point-in-time DCF over the grid for one set of rates.
+
+    :param rates: (required, perpetual, growth) rates as fractions.
+    :return: (grid with fair_value / upside columns, one-row stats DataFrame)
+    """
+    required_rate, perpetual_rate, cash_flow_growth_rate = rates
+    result = grid.copy()
+    result['fair_value'] = dcf_batch(
+        result['free_cash_flow'], result['shares'], required_rate, perpetual_rate, cash_flow_growth_rate
+    )
+    result['upside'] = result['fair_value'] / result['price'] - 1
+    valid = result.dropna(subset=['upside'])
+    return result, _signal_stats(valid[['upside']], valid['forward_return'])
+
+
+def sweep_rates(grid, required_rates, perpetual_rates, growth_rates):
+    """
+    Backtest stats for every combination of rates, evaluated as one (rows x combos) matrix.
+
+    :param grid: Output of build_grid (only free_cash_flow, shares, price and forward_return are used).
+    :return: DataFrame indexed by (required_rate, perpetual_rate, cash_flow_growth_rate).
+    """
+    combos = pd.MultiIndex.from_product(
+        [required_rates, perpetual_rates, growth_rates],
+        names=['required_rate', 'perpetual_rate', 'cash_flow_growth_rate'],
+    )
+    r, p, g = (np.asarray(combos.get_level_values(i), dtype=float)[None, :] for i in range(3))
+
+    fair_values = dcf_batch(
+        grid['free_cash_flow'].to_numpy()[:, None], grid['shares'].to_numpy()[:, None], r, p, g
+    )
+    upside = pd.DataFrame(fair_values / grid['price'].to_numpy()[:, None] - 1, columns=combos)
+    return _signal_stats(upside, grid['forward_return'])
@@ -0,0 +1,205 @@
+import os
+import time
+import zlib
+import logging
+import requests_cache
+from datetime import timezone
+from requests_cache.backends.sqlite import SQLiteDict
+from requests_cache.serializers import SerializerPipeline, Stage, pickle_serializer
+
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Backend selection - every replica pointing at the same Redis server shares one warm cache
+CACHE_BACKEND = os.environ.get('FMP_CACHE_BACKEND', 'sqlite')   # sqlite | filesystem | redis
+CACHE_NAME = os.environ.get('FMP_CACHE_NAME', 'fmp_cache')
+REDIS_URL = os.environ.get('FMP_CACHE_REDIS_URL', 'redis://localhost:6379/0')
+CACHE_MAX_MB = float(os.environ.get('FMP_CACHE_MAX_MB', 200))
+COMPRESS_MIN_BYTES = int(os.environ.get('FMP_CACHE_COMPRESS_MIN_BYTES', 4096))
+
+# Last-access timestamps are only written once per key per interval to avoid a write on every hit
+ACCESS_WRITE_INTERVAL = 60
+
+# Configure cache with URL pattern matching
+urls_expire_after = {
+    '*/profile*': 86400,                      # 24h - company profile
+    '*/quote*': 3600,                         # 1h - stock prices
+    '*/balance-sheet-statement*': 86400 * 7,  # 7 days - financials
+    '*/income-statement*': 86400 * 7,         # 7 days - financials
+    '*/cash-flow-statement*': 86400 * 7,      # 7 days - financials
+    '*/key-metrics*': 86400,                  # 24h - metrics
+    '*/ratios*': 86400,                       # 24h - ratios
+    '*/historical-price-eod*': 3600,          # 1h - historical prices
+    '*/historical-chart*': 300,               # 5min - intraday prices
+}
+
+
+def _compress(data):
+    # One marker byte tells loads() whether the payload was worth compressing
+    if len(data) >= COMPRESS_MIN_BYTES:
+        return b'z' + zlib.compress(data)
+    return b'r' + data
+
+
+def _decompress(data):
+    if data[:1] == b'z':
+        return zlib.decompress(data[1:])
+    return data[1:]
+
+
+# Pickle serializer with zlib compression for large payloads (EOD history, statements)
+compressed_serializer = SerializerPipeline(
+    [*pickle_serializer.stages, Stage(dumps=_compress, loads=_decompress)],
+    name='pickle_zlib',
+    is_binary=True,
+)
+
+
+def build_backend(backend=None, connection=None):
+    """
+    Create the requests-cache storage backend.
+
+    :param backend: 'sqlite', 'filesystem' or 'redis' (defaults to FMP_CACHE_BACKEND).
+    :param connection: Optional Redis client, e.g. a local stand-in server used in tests.
+    :return: A requests_cache BaseCache instance.
+    """
+    backend = (backend or CACHE_BACKEND).lower()
+
+    if backend == 'sqlite':
+        # WAL lets readers keep going while another writer holds the lock
+        return requests_cache.SQLiteCache(CACHE_NAME, wal=True, serializer=compressed_serializer)
+    if backend == 'filesystem':
+        return requests_cache.FileCache(CACHE_NAME, serializer=compressed_serializer)
+    if backend == 'redis':
+        if connection is None:
+            from redis import Redis
+            connection = Redis.from_url(REDIS_URL)
+        # Entries get a server-side TTL, so Redis drops them on expiry without a sweep
+        return requests_cache.RedisCache(
+            namespace=CACHE_NAME, connection=connection, ttl=True, serializer=compressed_serializer
+        )
+
+    raise ValueError(f"Unsupported cache backend: {backend}. Use sqlite, filesystem or redis.")
+
+
+def install_cache(backend=None, connection=None):
+    """Install the FMP response cache globally and return the backend in use"""
+    cache = build_backend(backend, connection)
+
+    requests_cache.install_cache(
+        CACHE_NAME,
+        backend=cache,
+        urls_expire_after=urls_expire_after,
+        allowable_codes=[200],
+        match_headers=False,
+        ignored_parameters=['apikey']
+    )
+
+    logging.info(f"FMP API cache initialized with {type(cache).__name__} backend")
+    return cache
+
+
+def build_access_log(cache):
+    """
+    Storage for last-access timestamps (cache_key -> epoch seconds), kept next to the responses.
+
+    SQLite keeps them in an extra table of the same file, Redis in a separate hash (not under the
+    response keys), and the filesystem backend in a small SQLite file beside the cache directory
+    (files inside it would be listed as cache keys).
+    """
+    if isinstance(cache, requests_cache.SQLiteCache):
+        return SQLiteDict(cache.responses.db_path, table_name='access_times', serializer=None)
+    if isinstance(cache, requests_cache.RedisCache):
+        from requests_cache.backends.redis import RedisHashDict
+        return RedisHashDict(CACHE_NAME, 'access_times', connection=cache.responses.connection, serializer=None)
+    if isinstance(cache, requests_cache.FileCache):
+        return SQLiteDict(f"{cache.responses.cache_dir}_access_times.sqlite", serializer=None)
+    return {}
+
+
+def cached_responses(cache):
+    """
+    Iterate over (cache_key, response) pairs; response is None when it cannot be deserialized.
+
+    Keys that cannot be read at all (e.g. redirects.sqlite inside a filesystem cache) are skipped.
+    """
+    for key in list(cache.responses.keys()):
+        try:
+            yield key, cache.responses[key]
+        except KeyError:
+            continue
+
+
+def stored_size(cache, response):
+    """Bytes a response takes in the backend, i.e. after serialization and compression"""
+    return len(cache.responses.serializer.dumps(response))
+
+
+def _epoch(dt):
+    # requests-cache timestamps are UTC, whether or not tzinfo is attached
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+_access_log = None
+_last_access_write = {}
+
+
+def record_access(cache_key):
+    """Remember that a cached response was used, for LRU eviction"""
+    global _access_log
+    cache = requests_cache.get_cache()
+    if cache is None or not cache_key:
+        return
+
+    now = time.time()
+    if now - _last_access_write.get(cache_key, 0) < ACCESS_WRITE_INTERVAL:
+        return
+    if _access_log is None:
+        _access_log = build_access_log(cache)
+
+    _access_log[cache_key] = now
+    _last_access_write[cache_key] = now
+
+
+def enforce_size_limit(cache=None, max_mb=None):
+    """
+    Keep the cache under max_mb: expired responses go first, then the least recently used.
+
+    :return: Number of responses removed.
+    """
+    if cache is None:
+        cache = requests_cache.get_cache()
+    if cache is None:
+        return 0
+    max_bytes = (max_mb if max_mb is not None else CACHE_MAX_MB) * 1024 * 1024
+    access_log = build_access_log(cache)
+
+    entries = []
+    expired_keys = []
+    for key, response in cached_responses(cache):
+        # Unreadable entries (e.g. written by an older serializer) are treated as expired
+        if response is None or response.is_expired:
+            expired_keys.append(key)
+        else:
+            last_used = float(access_log.get(key) or _epoch(response.created_at))
+            entries.append((last_used, stored_size(cache, response), key))
+
+    # Least recently used first until we fit
+    entries.sort()
+    total = sum(size for _, size, _ in entries)
+    evict_keys = []
+    for _, size, key in entries:
+        if total <= max_bytes:
+            break
+        evict_keys.append(key)
+        total -= size
+
+    keys = expired_keys + evict_keys
+    if keys:
+        cache.delete(*keys)
+        for key in keys:
+            access_log.pop(key, None)
+        logging.info(f"Cache eviction removed {len(expired_keys)} expired and {len(evict_keys)} least recently used responses")
+    return len(keys)
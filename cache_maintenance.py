@@ -0,0 +1,91 @@
+import os
+import sys
+import logging
+from urllib.parse import urlparse
+import pandas as pd
+import requests_cache
+from cache_backend import install_cache, cached_responses, enforce_size_limit, stored_size
+
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+def _endpoint(url):
+    # https://financialmodelingprep.com/stable/historical-price-eod/full?... -> historical-price-eod/full
+    path = urlparse(url).path
+    return path.split('/stable/', 1)[-1].strip('/')
+
+
+def storage_size(cache):
+    """On-disk size of the cache in bytes (None when the backend does not expose it, e.g. Redis)"""
+    if isinstance(cache, requests_cache.SQLiteCache):
+        return cache.responses.size()
+    if isinstance(cache, requests_cache.FileCache):
+        # Response files only, not the redirects database kept in the same directory
+        redirects = os.path.abspath(cache.redirects.db_path)
+        return sum(
+            os.path.getsize(path) for path in cache.responses.paths() if os.path.abspath(path) != redirects
+        )
+    return None
+
+
+def storage_report(cache=None):
+    """
+    Per-endpoint storage usage of the response cache.
+
+    :return: DataFrame indexed by endpoint with responses, expired and stored bytes (serialized and compressed).
+    """
+    if cache is None:
+        cache = requests_cache.get_cache()
+
+    rows = []
+    for _, response in cached_responses(cache):
+        if response is None:
+            continue
+        rows.append({
+            'endpoint': _endpoint(response.url),
+            'responses': 1,
+            'expired': int(response.is_expired),
+            'stored_bytes': stored_size(cache, response),
+        })
+
+    if not rows:
+        return pd.DataFrame(columns=['responses', 'expired', 'stored_bytes'])
+
+    report = pd.DataFrame(rows).groupby('endpoint').sum()
+    return report.sort_values('stored_bytes', ascending=False)
+
+
+def compact(cache=None, max_mb=None):
+    """
+    Drop expired and least recently used responses, then reclaim the freed space.
+
+    :return: Number of responses removed.
+    """
+    if cache is None:
+        cache = requests_cache.get_cache()
+
+    removed = enforce_size_limit(cache, max_mb)
+
+    # SQLite does not shrink the file on delete
+    if removed and isinstance(cache, requests_cache.SQLiteCache):
+        cache.responses.vacuum()
+        logging.info(f"Cache vacuumed, size is now {cache.responses.size() / 1024 / 1024:.1f} MB")
+
+    return removed
+
+
+if __name__ == '__main__':
+    # python cache_maintenance.py [report|compact]
+    command = sys.argv[1] if len(sys.argv) > 1 else 'report'
+    cache = install_cache()
+
+    if command == 'compact':
+        compact(cache)
+    elif command != 'report':
+        sys.exit(f"Unknown command: {command}. Use report or compact.")
+
+    print(storage_report(cache).to_string())
+    size = storage_size(cache)
+    if size is not None:
+        print(f"\nTotal on disk: {size / 1024 / 1024:.1f} MB")
@@ -0,0 +1,151 @@
+import os
+import logging
+import threading
+import multiprocessing
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from backtest import sweep_rates
+from indicators import latest_indicators
+
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+MAX_WORKERS = int(os.environ.get('COMPUTE_MAX_WORKERS', os.cpu_count() or 1))
+MAX_JOBS_PER_USER = int(os.environ.get('COMPUTE_MAX_JOBS_PER_USER', 2))
+
+# Backtest grid columns a rate sweep needs
+SWEEP_COLUMNS = ['free_cash_flow', 'shares', 'price', 'forward_return']
+
+
+class TooManyJobs(RuntimeError):
+    """Raised when a user already has MAX_JOBS_PER_USER jobs running"""
+
+
+# Shared memory helpers ######################################################
+
+def share_array(array):
+    """
+    Copy an array into a new shared memory block.
+
+    :return: (shared memory block, spec) - the spec is what gets sent to the worker.
+    """
+    array = np.ascontiguousarray(array)
+    block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+    return block, (block.name, array.shape, array.dtype.str)
+
+
+def _attach(spec):
+    name, shape, dtype = spec
+    # Spawned workers share the parent's resource tracker; the parent unlinks the block when the job ends
+    block = shared_memory.SharedMemory(name=name)
+    return block, np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+
+
+# Jobs (run in the worker processes) #########################################
+
+def _screen_job(close_spec, volume_spec, index, tickers):
+    close_block, close = _attach(close_spec)
+    volume_block, volume = _attach(volume_spec)
+    try:
+        return latest_indicators(
+            pd.DataFrame(close, index=index, columns=tickers),
+            pd.DataFrame(volume, index=index, columns=tickers),
+        )
+    finally:
+        close_block.close()
+        volume_block.close()
+
+
+def _sweep_job(grid_spec, required_rates, perpetual_rates, growth_rates):
+    grid_block, grid = _attach(grid_spec)
+    try:
+        return sweep_rates(pd.DataFrame(grid, columns=SWEEP_COLUMNS), required_rates, perpetual_rates, growth_rates)
+    finally:
+        grid_block.close()
+
+
+# Service ####################################################################
+
+class ComputeService:
+    """Runs CPU-bound indicator / DCF jobs in a process pool, at most max_jobs_per_user at a time per user"""
+
+    def __init__(self, max_workers=MAX_WORKERS, max_jobs_per_user=MAX_JOBS_PER_USER):
+        # spawn: forking the multi-threaded Streamlit server is not safe
+        self._executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn'))
+        self._max_jobs_per_user = max_jobs_per_user
+        self._active = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def _submit(self, user, blocks, fn, *args):
+        with self._lock:
+            if self._active[user] >= self._max_jobs_per_user:
+                for block in blocks:
+                    block.close()
+                    block.unlink()
+                raise TooManyJobs(f"{self._active[user]} jobs already running, wait for them to finish")
+            self._active[user] += 1
+
+        def release(_):
+            # Inputs are only needed until the job ends
+            for block in blocks:
+                block.close()
+                block.unlink()
+            with self._lock:
+                self._active[user] -= 1
+
+        try:
+            future = self._executor.submit(fn, *args)
+        except Exception:
+            release(None)
+            raise
+        future.add_done_callback(release)
+        return future
+
+    def submit_screen(self, user, close, volume):
+        """
+        Screener indicators for many tickers.
+
+        :param close: DataFrame of daily closes, one column per ticker.
+        :param volume: DataFrame of daily volumes, same shape.
+        :return: Future resolving to indicators.latest_indicators output.
+        """
+        close_block, close_spec = share_array(close.to_numpy(dtype=float))
+        volume_block, volume_spec = share_array(volume.to_numpy(dtype=float))
+        return self._submit(
+            user, [close_block, volume_block],
+            _screen_job, close_spec, volume_spec, close.index, list(close.columns),
+        )
+
+    def submit_sweep(self, user, grid, required_rates, perpetual_rates, growth_rates):
+        """
+        Backtest DCF rate sweep (backtest.sweep_rates) over every rate combination.
+
+        :param grid: Backtest grid as returned by backtest.build_grid.
+        :param required_rates: Required rates (fractions) to evaluate.
+        :param perpetual_rates: Perpetual growth rates (fractions) to evaluate.
+        :param growth_rates: Cash flow growth rates (fractions) to evaluate.
+        :return: Future resolving to the stats DataFrame indexed by (required, perpetual, growth).
+        """
+        grid_block, grid_spec = share_array(grid[SWEEP_COLUMNS].to_numpy(dtype=float))
+        return self._submit(
+            user, [grid_block],
+            _sweep_job, grid_spec, list(required_rates), list(perpetual_rates), list(growth_rates),
+        )
+
+
+@st.cache_resource
+def get_compute_service():
+    """One process pool shared by all sessions"""
+    return ComputeService()
+
+
+def current_user():
+    """Id of the current Streamlit session, used for the per-user job cap"""
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx else 'default'
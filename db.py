@@ -9,6 +9,53 @@ def create_db():
     CREATE TABLE IF NOT EXISTS stocks (
         ticker TEXT PRIMARY KEY
     )''')
+
+    # Create the valuations table (last computed DCF per ticker and the inputs it used)
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS valuations (
+        ticker TEXT PRIMARY KEY,
+        input_key TEXT NOT NULL,
+        fair_value REAL NOT NULL,
+        computed_at TEXT NOT NULL
+    )''')
+
+    # Create the ratios table (precomputed key metrics per ticker and statement period)
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS ratios (
+        ticker TEXT NOT NULL,
+        period TEXT NOT NULL,
+        metric TEXT NOT NULL,
+        value REAL,
+        computed_at TEXT NOT NULL,
+        PRIMARY KEY (ticker, period, metric)
+    )''')
+
+    # Create the alert tables: rules ('*' = every watchlist ticker), last seen data per ticker and source, fired alerts
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS alert_rules (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        ticker TEXT NOT NULL,
+        rule_type TEXT NOT NULL,
+        params TEXT NOT NULL
+    )''')
+
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS alert_state (
+        ticker TEXT NOT NULL,
+        source TEXT NOT NULL,
+        fingerprint TEXT NOT NULL,
+        updated_at TEXT NOT NULL,
+        PRIMARY KEY (ticker, source)
+    )''')
+
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS alerts (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        ticker TEXT NOT NULL,
+        rule_id INTEGER NOT NULL,
+        message TEXT NOT NULL,
+        created_at TEXT NOT NULL
+    )''')
     
     conn.commit()
     conn.close()
@@ -44,3 +91,120 @@ def get_all_stocks_from_db():
     
     conn.close()
     return stocks
+
+def save_valuation(ticker, input_key, fair_value):
+    conn = sqlite3.connect('stocks.db')
+    cursor = conn.cursor()
+
+    cursor.execute('''
+    INSERT OR REPLACE INTO valuations (ticker, input_key, fair_value, computed_at)
+    VALUES (?, ?, ?, datetime('now'))''', (ticker, input_key, fair_value))
+
+    conn.commit()
+    conn.close()
+
+def get_valuation(ticker):
+    conn = sqlite3.connect('stocks.db')
+    cursor = conn.cursor()
+
+    cursor.execute('SELECT input_key, fair_value, computed_at FROM valuations WHERE ticker = ?', (ticker,))
+    valuation = cursor.fetchone()
+
+    conn.close()
+    return valuation
+
+def get_valuations():
+    conn = sqlite3.connect('stocks.db')
+    cursor = conn.cursor()
+
+    cursor.execute('SELECT ticker, input_key, fair_value, computed_at FROM valuations')
+    valuations = {row[0]: row[1:] for row in cursor.fetchall()}
+
+    conn.close()
+    return valuations
+
+def save_ratios(ticker, rows):
+    conn = sqlite3.connect('stocks.db')
+    cursor = conn.cursor()
+
+    # Replace the whole ratio set of the ticker
+    cursor.execute('DELETE FROM ratios WHERE ticker = ?', (ticker,))
+    cursor.executemany('''
+    INSERT INTO ratios (ticker, period, metric, value, computed_at)
+    VALUES (?, ?, ?, ?, datetime('now'))''', [(ticker, period, metric, value) for period, metric, value in rows])
+
+    conn.commit()
+    conn.close()
+
+def get_ratios(ticker):
+    conn = sqlite3.connect('stocks.db')
+    cursor = conn.cursor()
+
+    cursor.execute('SELECT period, metric, value, computed_at FROM ratios WHERE ticker = ?', (ticker,))
+    ratios = cursor.fetchall()
+
+    conn.close()
+    return ratios
+
+def add_alert_rule(ticker, rule_type, params):
+    conn = sqlite3.connect('stocks.db')
+    cursor = conn.cursor()
+
+    cursor.execute('''
+    INSERT INTO alert_rules (ticker, rule_type, params)
+    VALUES (?, ?, ?)''', (ticker, rule_type, params))
+
+    conn.commit()
+    conn.close()
+
+def get_alert_rules():
+    conn = sqlite3.connect('stocks.db')
+    cursor = conn.cursor()
+
+    cursor.execute('SELECT id, ticker, rule_type, params FROM alert_rules')
+    rules = cursor.fetchall()
+
+    conn.close()
+    return rules
+
+def get_alert_state():
+    conn = sqlite3.connect('stocks.db')
+    cursor = conn.cursor()
+
+    cursor.execute('SELECT ticker, source, fingerprint FROM alert_state')
+    state = {(ticker, source): fingerprint for ticker, source, fingerprint in cursor.fetchall()}
+
+    conn.close()
+    return state
+
+def save_alert_state(fingerprints):
+    conn = sqlite3.connect('stocks.db')
+    cursor = conn.cursor()
+
+    cursor.executemany('''
+    INSERT OR REPLACE INTO alert_state (ticker, source, fingerprint, updated_at)
+    VALUES (?, ?, ?, datetime('now'))''', [(ticker, source, fingerprint) for (ticker, source), fingerprint in fingerprints.items()])
+
+    conn.commit()
+    conn.close()
+
+def save_alerts(alerts):
+    conn = sqlite3.connect('stocks.db')
+    cursor = conn.cursor()
+
+    cursor.executemany('''
+    INSERT INTO alerts (ticker, rule_id, message, created_at)
+    VALUES (?, ?, ?, datetime('now'))''', alerts)
+
+    conn.commit()
+    conn.close()
+
+def get_alerts(limit=100):
+    conn = sqlite3.connect('stocks.db')
+    cursor = conn.cursor()
+
+    cursor.execute('SELECT ticker, rule_id, message, created_at FROM alerts ORDER BY id DESC LIMIT ?', (limit,))
+    alerts = cursor.fetchall()
+
+    conn.close()
+    return alerts
@@ -1,24 +1,33 @@
 import streamlit as st
+import numpy as np
 import logging
 
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 
-def dcf(free_cash_flow: list[int], shares_outstanding: int) -> float:
+def dcf_rates() -> tuple[float, float, float]:
+    """Required, perpetual and cash flow growth rates (as fractions) from the sidebar sliders"""
+    return (
+        st.session_state.get('required_rate', 6) / 100,
+        st.session_state.get('perpetual_rate', 2) / 100,
+        st.session_state.get('cash_flow_growth_rate', 3) / 100,
+    )
+
+
+def dcf(free_cash_flow: list[int], shares_outstanding: int, rates: tuple[float, float, float] = None) -> float:
     """
     Calculate the fair value of a stock using Discounted Cash Flow (DCF) analysis.
 
     :param free_cash_flow: List of historical free cash flows (most recent last).
     :param shares_outstanding: Total number of shares outstanding.
+    :param rates: Optional (required, perpetual, cash flow growth) rates as fractions; defaults to the sidebar values.
     :return: Estimated fair value per share.
     """
     if not free_cash_flow or shares_outstanding <= 0:
         raise ValueError("Invalid input: free_cash_flow must be a non-empty list, and shares_outstanding must be positive.")
 
-    required_rate = st.session_state.get('required_rate', 6) / 100
-    perpetual_rate = st.session_state.get('perpetual_rate', 2) / 100
-    cash_flow_growth_rate = st.session_state.get('cash_flow_growth_rate', 3) / 100
+    required_rate, perpetual_rate, cash_flow_growth_rate = rates or dcf_rates()
 
     # Years for projection
     years = [1, 2, 3, 4]
@@ -47,3 +56,31 @@ def dcf(free_cash_flow: list[int], shares_outstanding: int) -> float:
     fair_value = round(total_present_value / shares_outstanding, 2)
 
     return fair_value
+
+
+def dcf_batch(last_free_cash_flow, shares_outstanding, required_rate, perpetual_rate, cash_flow_growth_rate, years=4):
+    """
+    Vectorized dcf() over numpy arrays; all arguments broadcast against each other.
+
+    :param last_free_cash_flow: Most recent free cash flow per ticker.
+    :param shares_outstanding: Shares outstanding per ticker.
+    :param required_rate: Required rate(s) as fractions.
+    :param perpetual_rate: Perpetual growth rate(s) as fractions.
+    :param cash_flow_growth_rate: Cash flow growth rate(s) as fractions.
+    :param years: Length of the projection period.
+    :return: Fair value per share (unrounded), NaN where shares <= 0 or required <= perpetual.
+    """
+    fcf, shares, r, p, g = np.broadcast_arrays(
+        *(np.asarray(a, dtype=float) for a in
+          (last_free_cash_flow, shares_outstanding, required_rate, perpetual_rate, cash_flow_growth_rate))
+    )
+
+    # Sum of discounted projected FCF is a geometric series with ratio (1 + g) / (1 + r)
+    ratio = (1 + g) / (1 + r)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        series = np.where(np.isclose(ratio, 1), years, ratio * (1 - ratio ** years) / (1 - ratio))
+        terminal_value = fcf * (1 + g) ** years * (1 + p) / (r - p)
+        total_present_value = fcf * series + terminal_value / (1 + r) ** years
+        fair_value = total_present_value / shares
+
+    return np.where((shares > 0) & (r > p), fair_value, np.nan)
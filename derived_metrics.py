@@ -0,0 +1,184 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+from fmp_client import STATEMENT_EXTRAS
+
+
+# Derived metrics that are ratios rather than percentages
+RATIO_METRICS = [
+    'Debt to Equity', 'Current Ratio', 'Quick Ratio', 'Cash Ratio',
+    'Net Debt to EBITDA', 'Interest Coverage', 'P/E', 'P/S', 'P/B', 'EV/EBITDA',
+]
+
+# Key metrics dashboard sections
+RATIO_CATEGORIES = {
+    'Valuation': ['P/E', 'P/S', 'P/B', 'EV/EBITDA', 'FCF Yield'],
+    'Profitability': ['Gross Margin', 'Operating Margin', 'Net Margin', 'FCF Margin', 'ROE', 'ROA'],
+    'Growth': ['Sales Growth 1Y', 'Sales Growth 3Y', 'Revenue CAGR 3Y', 'Net Income Growth 1Y', 'FCF Growth 1Y', 'FCF CAGR 3Y'],
+    'Liquidity': ['Current Ratio', 'Quick Ratio', 'Cash Ratio'],
+    'Leverage': ['Debt to Equity', 'Debt to Assets', 'Net Debt to EBITDA', 'Interest Coverage'],
+}
+
+
+def _periods(statement):
+    """Statement (metric x period) -> numeric frame (period x metric), latest period first"""
+    if statement.empty:
+        return pd.DataFrame(index=pd.DatetimeIndex([]))
+
+    df = statement.T.apply(pd.to_numeric, errors='coerce')
+    df.index = pd.to_datetime(df.index)
+    # Some FMP fields map to the same name (e.g. Cash Dividends Paid), keep the first
+    df = df.loc[:, ~df.columns.duplicated()]
+    return df.sort_index(ascending=False)
+
+
+def _column(df, name, periods):
+    return df[name].reindex(periods) if name in df else pd.Series(np.nan, index=periods)
+
+
+def _growth(series, periods):
+    return series / series.shift(-periods) - 1
+
+
+def _cagr(series, years):
+    ratio = series / series.shift(-years)
+    # CAGR is undefined when the start and end values have different signs
+    return ratio.where(ratio > 0) ** (1 / years) - 1
+
+
+def compute_derived_metrics(balance_sheet, financials, cashflow, market_cap=None):
+    """
+    Compute growth, margin, return and leverage metrics for every period at once.
+
+    :param balance_sheet: Balance sheet as returned by FMPTicker (metric x period).
+    :param financials: Income statement as returned by FMPTicker.
+    :param cashflow: Cash flow statement as returned by FMPTicker.
+    :param market_cap: Current market cap, used for FCF Yield (latest period only).
+    :return: DataFrame of metric x period, latest period first. Missing inputs give NaN.
+    """
+    bs, inc, cf = _periods(balance_sheet), _periods(financials), _periods(cashflow)
+    periods = bs.index.union(inc.index).union(cf.index).sort_values(ascending=False)
+    if len(periods) == 0:
+        return pd.DataFrame()
+
+    def column(df, name):
+        return _column(df, name, periods)
+
+    revenue = column(inc, 'Total Revenue')
+    net_income = column(inc, 'Net Income')
+    free_cash_flow = column(cf, 'Free Cash Flow')
+    equity = column(bs, 'Stockholders Equity')
+    total_assets = column(bs, 'Total Assets')
+    total_debt = column(bs, 'Total Debt')
+
+    metrics = pd.DataFrame({
+        'Sales Growth 1Y': _growth(revenue, 1),
+        'Sales Growth 3Y': _growth(revenue, 3),
+        'Revenue CAGR 3Y': _cagr(revenue, 3),
+        'Net Income Growth 1Y': _growth(net_income, 1),
+        'FCF Growth 1Y': _growth(free_cash_flow, 1),
+        'FCF CAGR 3Y': _cagr(free_cash_flow, 3),
+        'Gross Margin': column(inc, 'Gross Profit') / revenue,
+        'Operating Margin': column(inc, 'Operating Income') / revenue,
+        'Net Margin': net_income / revenue,
+        'FCF Margin': free_cash_flow / revenue,
+        'ROE': net_income / equity,
+        'ROA': net_income / total_assets,
+        'Debt to Equity': total_debt / equity,
+        'Debt to Assets': total_debt / total_assets,
+        'Current Ratio': column(bs, 'Current Assets') / column(bs, 'Current Liabilities'),
+    }, index=periods)
+
+    # Only the latest period can be priced with today's market cap
+    metrics['FCF Yield'] = np.nan
+    if market_cap:
+        metrics.iloc[0, metrics.columns.get_loc('FCF Yield')] = free_cash_flow.iloc[0] / market_cap
+
+    return metrics.replace([np.inf, -np.inf], np.nan).T
+
+
+def compute_ratio_table(balance_sheet, financials, cashflow, prices):
+    """
+    Derived metrics plus liquidity, leverage and per-period valuation ratios.
+
+    Valuation ratios use the market cap at each period end (close on that date x diluted shares).
+
+    :param prices: Daily history with a Close column covering the statement periods.
+    :return: DataFrame of metric x period, latest period first.
+    """
+    metrics = compute_derived_metrics(balance_sheet, financials, cashflow)
+    if metrics.empty:
+        return metrics
+
+    periods = metrics.columns
+    bs, inc, cf = _periods(balance_sheet), _periods(financials), _periods(cashflow)
+    metrics = metrics.T
+
+    current_liabilities = _column(bs, 'Current Liabilities', periods)
+    cash = _column(bs, 'Cash Cash Equivalents And Short Term Investments', periods)
+    total_debt = _column(bs, 'Total Debt', periods)
+    ebitda = _column(inc, 'EBITDA', periods)
+
+    inventory = _column(bs, 'inventory', periods).fillna(0)
+    metrics['Quick Ratio'] = (_column(bs, 'Current Assets', periods) - inventory) / current_liabilities
+    metrics['Cash Ratio'] = cash / current_liabilities
+    metrics['Net Debt to EBITDA'] = (total_debt - cash) / ebitda
+    metrics['Interest Coverage'] = _column(inc, 'Operating Income', periods) / _column(inc, 'interestExpense', periods)
+
+    if not prices.empty:
+        close = prices['Close'].sort_index().reindex(periods, method='ffill')
+        shares = _column(inc, 'weightedAverageShsOutDil', periods)
+        market_cap = close * shares
+        metrics['P/E'] = market_cap / _column(inc, 'Net Income', periods)
+        metrics['P/S'] = market_cap / _column(inc, 'Total Revenue', periods)
+        metrics['P/B'] = market_cap / _column(bs, 'Stockholders Equity', periods)
+        metrics['EV/EBITDA'] = (market_cap + total_debt - cash) / ebitda
+        metrics['FCF Yield'] = _column(cf, 'Free Cash Flow', periods) / market_cap
+
+    return metrics.replace([np.inf, -np.inf], np.nan).T
+
+
+# Prefixes of the merged metric frame, one per statement
+STATEMENT_PREFIXES = {
+    'balance_sheet': 'Balance Sheet',
+    'financials': 'Income',
+    'cashflow': 'Cash Flow',
+}
+
+
+def build_metric_frame(balance_sheet, financials, cashflow):
+    """
+    All numeric statement lines in one date-aligned frame (period x '<Statement>: <metric>').
+
+    Prefixing keeps names that exist in several statements (e.g. Net Income) apart.
+
+    :return: DataFrame indexed by period end, oldest first, for charting.
+    """
+    statements = {'balance_sheet': balance_sheet, 'financials': financials, 'cashflow': cashflow}
+    frames = [
+        # Period identification fields (fiscalYear, calendarYear...) are numeric but not metrics
+        _periods(statement).drop(columns=STATEMENT_EXTRAS, errors='ignore').add_prefix(f"{STATEMENT_PREFIXES[name]}: ")
+        for name, statement in statements.items()
+    ]
+    merged = pd.concat(frames, axis=1).sort_index()
+    # Other text fields become all-NaN after the numeric conversion
+    return merged.dropna(axis=1, how='all')
+
+
+@st.cache_data(ttl=86400, show_spinner=False)
+def cached_derived_metrics(ticker, market_cap, _balance_sheet, _financials, _cashflow):
+    """compute_derived_metrics cached per (ticker, market cap); statements are not hashed"""
+    return compute_derived_metrics(_balance_sheet, _financials, _cashflow, market_cap)
+
+
+def format_derived_metrics(metrics):
+    """Styler for metric x period tables (percentages vs plain ratios)"""
+    table = metrics.copy()
+    table.columns = [column.strftime('%Y-%m-%d') for column in table.columns]
+    percent_rows = [metric for metric in table.index if metric not in RATIO_METRICS]
+    ratio_rows = [metric for metric in table.index if metric in RATIO_METRICS]
+    return (
+        table.style
+        .format('{:.2%}', subset=pd.IndexSlice[percent_rows, :], na_rep='-')
+        .format('{:.2f}', subset=pd.IndexSlice[ratio_rows, :], na_rep='-')
+    )
@@ -0,0 +1,87 @@
+import os
+import sys
+import json
+import time
+import hashlib
+import logging
+
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# live: call FMP, record: call FMP and save responses, replay: serve saved responses only
+FMP_MODE = os.environ.get('FMP_MODE', 'live')
+FIXTURES_DIR = os.environ.get('FMP_FIXTURES_DIR', 'fixtures')
+REPLAY_LATENCY_MS = float(os.environ.get('FMP_REPLAY_LATENCY_MS', 0))
+
+# Left out of fixture keys: the API key, and date bounds that move every day (history() filters locally)
+IGNORED_PARAMS = {'apikey', 'from', 'to'}
+
+
+def fixture_path(endpoint, params):
+    """File holding the response for an endpoint + params combination"""
+    key_params = sorted((k, str(v)) for k, v in (params or {}).items() if k not in IGNORED_PARAMS)
+    digest = hashlib.sha1(json.dumps([endpoint, key_params]).encode()).hexdigest()[:16]
+    symbol = (params or {}).get('symbol', 'all')
+    return os.path.join(FIXTURES_DIR, symbol, f"{endpoint.replace('/', '_')}-{digest}.json")
+
+
+def _rows(data):
+    if isinstance(data, dict) and 'historical' in data:
+        data = data['historical']
+    return len(data) if isinstance(data, list) else 0
+
+
+def record_fixture(endpoint, params, data):
+    path = fixture_path(endpoint, params)
+
+    # History keys ignore from/to, so a shorter range (e.g. the Screener's 1y) must not replace a wider recording
+    if {'from', 'to'} & set(params or {}) and os.path.exists(path):
+        with open(path) as f:
+            if _rows(json.load(f)) > _rows(data):
+                logging.info(f"Record: keeping the wider fixture for {endpoint} ({path})")
+                return
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(data, f)
+
+
+def replay_fixture(endpoint, params):
+    """Recorded response for a request, or None when it was never recorded"""
+    if REPLAY_LATENCY_MS:
+        time.sleep(REPLAY_LATENCY_MS / 1000)
+
+    path = fixture_path(endpoint, params)
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        logging.warning(f"Replay: no fixture for {endpoint} {params} ({path})")
+        return None
+
+    logging.info(f"Replay HIT for {endpoint}")
+    return data
+
+
+def record_tickers(tickers):
+    """Fetch everything the pages use for the given tickers, saving each response as a fixture"""
+    import fmp_client as yf
+
+    for ticker in tickers:
+        stock = yf.Ticker(ticker)
+        stock.info
+        stock.balance_sheet
+        stock.financials
+        stock.cashflow
+        # Replay ignores the date range, so one full history serves every period
+        stock.history(period='max')
+        logging.info(f"Recorded fixtures for {stock.ticker}")
+
+
+if __name__ == '__main__':
+    # FMP_MODE=record python fixtures.py AAPL MSFT
+    if FMP_MODE != 'record':
+        sys.exit("Set FMP_MODE=record to record fixtures")
+    if len(sys.argv) < 2:
+        sys.exit("Usage: FMP_MODE=record python fixtures.py TICKER [TICKER ...]")
+    record_tickers(sys.argv[1:])
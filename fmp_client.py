@@ -1,36 +1,169 @@
+import os
+import json
 import requests
 import requests_cache
 import pandas as pd
 import logging
-from config import FMP_API_KEY
+from fixtures import FMP_MODE, record_fixture, replay_fixture
+
+# config.py is only needed when talking to FMP (not in replay mode)
+try:
+    from config import FMP_API_KEY
+except ImportError:
+    FMP_API_KEY = os.environ.get('FMP_API_KEY', '')
+from cache_backend import install_cache, record_access
+from cache_maintenance import compact
+from indicators import resample_ohlc
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-# Configure cache with URL pattern matching
-urls_expire_after = {
-    '*/profile*': 86400,                      # 24h - company profile
-    '*/quote*': 3600,                         # 1h - stock prices
-    '*/balance-sheet-statement*': 86400 * 7,  # 7 days - financials
-    '*/income-statement*': 86400 * 7,         # 7 days - financials
-    '*/cash-flow-statement*': 86400 * 7,      # 7 days - financials
-    '*/key-metrics*': 86400,                  # 24h - metrics
-    '*/ratios*': 86400,                       # 24h - ratios
-    '*/historical-price-eod*': 3600,          # 1h - historical prices
+# Install cache globally (backend chosen via FMP_CACHE_BACKEND, see cache_backend.py).
+# A backend that cannot be reached (e.g. Redis down) must not take every page down: run uncached instead
+try:
+    cache = install_cache()
+    compact(cache)
+except Exception as e:
+    logging.error(f"FMP API cache unavailable, running without cache: {e}")
+    requests_cache.uninstall_cache()
+    cache = None
+
+BASE_URL = "https://financialmodelingprep.com/stable"
+
+# Seconds to wait for FMP before giving up on a request
+REQUEST_TIMEOUT = 10
+
+# Map FMP field names to yfinance names
+BALANCE_SHEET_FIELDS = {
+    'totalAssets': 'Total Assets',
+    'totalLiabilities': 'Total Liabilities Net Minority Interest',
+    'totalStockholdersEquity': 'Stockholders Equity',
+    'cashAndCashEquivalents': 'Cash Cash Equivalents And Short Term Investments',
+    'totalCurrentAssets': 'Current Assets',
+    'totalCurrentLiabilities': 'Current Liabilities',
+    'longTermDebt': 'Long Term Debt',
+    'totalDebt': 'Total Debt',
+    'retainedEarnings': 'Retained Earnings',
+    'commonStock': 'Common Stock',
 }
 
-# Install cache globally
-requests_cache.install_cache(
-    'fmp_cache',
-    backend='sqlite',
-    urls_expire_after=urls_expire_after,
-    allowable_codes=[200],
-    match_headers=False,
-    ignored_parameters=['apikey']
-)
+FINANCIALS_FIELDS = {
+    'revenue': 'Total Revenue',
+    'costOfRevenue': 'Cost Of Revenue',
+    'grossProfit': 'Gross Profit',
+    'operatingIncome': 'Operating Income',
+    'netIncome': 'Net Income',
+    'ebitda': 'EBITDA',
+    'eps': 'Basic EPS',
+    'operatingExpenses': 'Operating Expense',
+}
 
-logging.info("FMP API cache initialized with SQLite backend")
+CASHFLOW_FIELDS = {
+    'operatingCashFlow': 'Operating Cash Flow',
+    'capitalExpenditure': 'Capital Expenditure',
+    'freeCashFlow': 'Free Cash Flow',
+    'dividendsPaid': 'Cash Dividends Paid',
+    'commonDividendsPaid': 'Cash Dividends Paid',
+}
 
-BASE_URL = "https://financialmodelingprep.com/stable"
+# Statement fields kept besides the mapped ones (period identification, filing dates, ratio inputs)
+STATEMENT_EXTRAS = ['date', 'symbol', 'period', 'fiscalYear', 'calendarYear', 'filingDate', 'fillingDate']
+
+# Fields kept per endpoint before a response is cached; everything else (links, cik, ...) is dropped
+RESPONSE_FIELDS = {
+    'balance-sheet-statement': [
+        *BALANCE_SHEET_FIELDS, *STATEMENT_EXTRAS,
+        'cashAndShortTermInvestments', 'inventory', 'netReceivables', 'netDebt',
+    ],
+    'income-statement': [
+        *FINANCIALS_FIELDS, *STATEMENT_EXTRAS,
+        'interestExpense', 'depreciationAndAmortization', 'epsDiluted', 'epsdiluted',
+        'weightedAverageShsOut', 'weightedAverageShsOutDil',
+    ],
+    'cash-flow-statement': [*CASHFLOW_FIELDS, *STATEMENT_EXTRAS],
+    'historical-price-eod/full': ['date', 'open', 'high', 'low', 'close', 'volume'],
+    'key-metrics': ['date', 'revenuePerShare', 'numberOfShares'],
+    'ratios': ['date', 'pegRatio', 'priceToSalesRatio', 'operatingProfitMargin'],
+}
+
+# history() periods -> how far back from the end date they reach (max = no lower bound, ytd handled separately)
+HISTORY_PERIODS = {
+    '1d': pd.DateOffset(days=1),
+    '5d': pd.DateOffset(days=5),
+    '1mo': pd.DateOffset(months=1),
+    '3mo': pd.DateOffset(months=3),
+    '6mo': pd.DateOffset(months=6),
+    '1y': pd.DateOffset(years=1),
+    '2y': pd.DateOffset(years=2),
+    '5y': pd.DateOffset(years=5),
+    '10y': pd.DateOffset(years=10),
+    'max': None,
+}
+
+# yfinance intraday intervals -> FMP historical-chart endpoints
+INTRADAY_INTERVALS = {
+    '1m': '1min',
+    '5m': '5min',
+    '15m': '15min',
+    '30m': '30min',
+    '1h': '1hour',
+    '60m': '1hour',
+    '4h': '4hour',
+}
+
+# Intervals built from daily bars -> resample rule
+RESAMPLED_INTERVALS = {
+    '1d': None,
+    '1wk': 'W-MON',
+    '1mo': 'MS',
+    '3mo': 'QS',
+}
+
+# Intraday bars have the same shape as EOD bars
+RESPONSE_FIELDS.update({
+    f'historical-chart/{name}': RESPONSE_FIELDS['historical-price-eod/full'] for name in INTRADAY_INTERVALS.values()
+})
+
+
+def _date_range(period, start=None, end=None):
+    """Resolve a yfinance-style period (or explicit start / end) to (start or None, end) timestamps"""
+    end = pd.Timestamp(end).normalize() if end is not None else pd.Timestamp.today().normalize()
+    if start is not None:
+        return pd.Timestamp(start).normalize(), end
+    if period == 'ytd':
+        return end.replace(month=1, day=1), end
+    if period not in HISTORY_PERIODS:
+        raise ValueError(f"Unsupported period: {period}")
+
+    offset = HISTORY_PERIODS[period]
+    return (end - offset if offset is not None else None), end
+
+
+def _project(data, fields):
+    """Keep only the given fields in each row of an FMP response"""
+    fields = set(fields)
+    if isinstance(data, dict) and 'historical' in data:
+        return {**data, 'historical': _project(data['historical'], fields)}
+    if isinstance(data, list):
+        return [{k: v for k, v in row.items() if k in fields} for row in data]
+    return data
+
+
+def _trim_hook(fields):
+    """
+    Response hook projecting the JSON body to the given fields.
+
+    Hooks run before requests-cache saves the response, so only the trimmed body is ever written.
+    """
+    def hook(response, *args, **kwargs):
+        if getattr(response, 'from_cache', False) or not response.ok:
+            return response
+        try:
+            data = response.json()
+        except ValueError:
+            return response
+        response._content = json.dumps(_project(data, fields)).encode()
+        return response
+    return hook
 
 
 class FMPTicker:
@@ -43,17 +176,26 @@ class FMPTicker:
 
     def _make_request(self, endpoint, extra_params=None):
         """Make API request to FMP"""
+        # Offline mode: answer from recorded fixtures, no network or API key needed
+        if FMP_MODE == 'replay':
+            return replay_fixture(endpoint, extra_params)
+
         url = f"{BASE_URL}/{endpoint}"
         params = {"apikey": FMP_API_KEY}
         if extra_params:
             params.update(extra_params)
 
+        # Cache only the fields we use, see _trim_hook()
+        fields = RESPONSE_FIELDS.get(endpoint)
+        hooks = {'response': _trim_hook(fields)} if fields else None
+
         try:
-            response = requests.get(url, params=params)
+            response = requests.get(url, params=params, timeout=REQUEST_TIMEOUT, hooks=hooks)
             response.raise_for_status()
             data = response.json()
 
             # Log cache status
+            record_access(getattr(response, 'cache_key', None))
             if hasattr(response, 'from_cache') and response.from_cache:
                 logging.info(f"Cache HIT for {endpoint}")
             else:
@@ -64,6 +206,9 @@ class FMPTicker:
                 logging.error(f"FMP API Error: {data['Error Message']}")
                 return None
 
+            if FMP_MODE == 'record':
+                record_fixture(endpoint, extra_params, data)
+
             return data
         except requests.exceptions.HTTPError as e:
             logging.error(f"HTTP Error from FMP: {e}")
@@ -147,21 +292,7 @@ class FMPTicker:
         df['date'] = pd.to_datetime(df['date'])
         df = df.set_index('date')
 
-        # Map FMP field names to yfinance names
-        field_mapping = {
-            'totalAssets': 'Total Assets',
-            'totalLiabilities': 'Total Liabilities Net Minority Interest',
-            'totalStockholdersEquity': 'Stockholders Equity',
-            'cashAndCashEquivalents': 'Cash Cash Equivalents And Short Term Investments',
-            'totalCurrentAssets': 'Current Assets',
-            'totalCurrentLiabilities': 'Current Liabilities',
-            'longTermDebt': 'Long Term Debt',
-            'totalDebt': 'Total Debt',
-            'retainedEarnings': 'Retained Earnings',
-            'commonStock': 'Common Stock',
-        }
-
-        df = df.rename(columns=field_mapping)
+        df = df.rename(columns=BALANCE_SHEET_FIELDS)
         self._balance_sheet = df.T
 
         return self._balance_sheet
@@ -183,19 +314,7 @@ class FMPTicker:
         df['date'] = pd.to_datetime(df['date'])
         df = df.set_index('date')
 
-        # Map FMP field names to yfinance names
-        field_mapping = {
-            'revenue': 'Total Revenue',
-            'costOfRevenue': 'Cost Of Revenue',
-            'grossProfit': 'Gross Profit',
-            'operatingIncome': 'Operating Income',
-            'netIncome': 'Net Income',
-            'ebitda': 'EBITDA',
-            'eps': 'Basic EPS',
-            'operatingExpenses': 'Operating Expense',
-        }
-
-        df = df.rename(columns=field_mapping)
+        df = df.rename(columns=FINANCIALS_FIELDS)
         self._financials = df.T
 
         return self._financials
@@ -217,28 +336,41 @@ class FMPTicker:
         df['date'] = pd.to_datetime(df['date'])
         df = df.set_index('date')
 
-        # Map FMP field names to yfinance names
-        field_mapping = {
-            'operatingCashFlow': 'Operating Cash Flow',
-            'capitalExpenditure': 'Capital Expenditure',
-            'freeCashFlow': 'Free Cash Flow',
-            'dividendsPaid': 'Cash Dividends Paid',
-            'commonDividendsPaid': 'Cash Dividends Paid',
-        }
-
-        df = df.rename(columns=field_mapping)
+        df = df.rename(columns=CASHFLOW_FIELDS)
         self._cashflow = df.T
 
         return self._cashflow
 
-    def history(self, period="1y", interval="1d"):
-        """Get historical price data"""
-        data = self._make_request("historical-price-eod/full", {"symbol": self.ticker})
-        if not data or 'historical' not in data:
+    def history(self, period="1y", interval="1d", start=None, end=None):
+        """
+        Get historical price data.
+
+        :param period: 1d, 5d, 1mo, 3mo, 6mo, 1y, 2y, 5y, 10y, ytd or max (ignored when start is given).
+        :param interval: Daily (1d), intraday (1m, 5m, 15m, 30m, 1h, 4h) or resampled daily bars (1wk, 1mo, 3mo).
+        :param start: Optional first date (anything pd.Timestamp accepts).
+        :param end: Optional last date, defaults to today.
+        """
+        if interval not in INTRADAY_INTERVALS and interval not in RESAMPLED_INTERVALS:
+            raise ValueError(f"Unsupported interval: {interval}")
+        start, end = _date_range(period, start, end)
+
+        # Only the requested range is transferred
+        params = {"symbol": self.ticker, "to": end.strftime('%Y-%m-%d')}
+        if start is not None:
+            params["from"] = start.strftime('%Y-%m-%d')
+
+        if interval in INTRADAY_INTERVALS:
+            endpoint = f"historical-chart/{INTRADAY_INTERVALS[interval]}"
+        else:
+            endpoint = "historical-price-eod/full"
+
+        data = self._make_request(endpoint, params)
+        rows = data.get('historical') if isinstance(data, dict) else data
+        if not rows:
             logging.warning(f"No historical price data for {self.ticker}")
             return pd.DataFrame(columns=['Open', 'High', 'Low', 'Close', 'Volume'])
 
-        df = pd.DataFrame(data['historical'])
+        df = pd.DataFrame(rows)
         df['date'] = pd.to_datetime(df['date'])
         df = df.set_index('date')
         df = df.sort_index()
@@ -251,14 +383,14 @@ class FMPTicker:
             'close': 'Close',
             'volume': 'Volume'
         })
+        df = df[['Open', 'High', 'Low', 'Close', 'Volume']]
 
-        # Filter by period
-        if period == "1y":
-            df = df.last('365D')
-        elif period == "6mo":
-            df = df.last('180D')
+        # The API already filtered by date; this only trims partial days at the edges
+        df = df[df.index < end + pd.Timedelta(days=1)]
+        if start is not None:
+            df = df[df.index >= start]
 
-        return df[['Open', 'High', 'Low', 'Close', 'Volume']]
+        return resample_ohlc(df, RESAMPLED_INTERVALS.get(interval))
 
 
 def download(ticker, period="6mo", interval="1d"):
@@ -0,0 +1,106 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+import streamlit as st
+import fmp_client as yf
+from derived_metrics import compute_derived_metrics
+
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Mapped info fields carried into the panel
+PANEL_INFO_FIELDS = [
+    'longName',
+    'sector',
+    'industry',
+    'currentPrice',
+    'marketCap',
+    'trailingPE',
+    'trailingPegRatio',
+    'priceToSalesTrailing12Months',
+    'operatingMargins',
+]
+
+# Latest raw statement values carried into the panel (inputs of the valuation models)
+PANEL_STATEMENT_FIELDS = {
+    'cashflow': ['Free Cash Flow', 'Cash Dividends Paid'],
+    'financials': ['EBITDA', 'Basic EPS', 'Net Income'],
+    'balance_sheet': ['Total Debt', 'Cash Cash Equivalents And Short Term Investments'],
+}
+
+# Panel columns that are labels rather than metrics
+LABEL_COLUMNS = ['longName', 'sector', 'industry']
+
+
+def _latest_values(statement, fields):
+    if statement.empty:
+        return {}
+    latest = statement.iloc[:, 0]
+    # Several FMP fields can map to one name (Cash Dividends Paid), keep the first
+    latest = latest[~latest.index.duplicated()]
+    return {field: latest[field] for field in fields if field in latest.index}
+
+
+def panel_row(stock):
+    """Panel row for one FMPTicker, or None when there is no info for it"""
+    info = stock.info
+    if not info:
+        logging.warning(f"Panel: no info for {stock.ticker}, skipped")
+        return None
+
+    row = {'ticker': stock.ticker, **{field: info.get(field) for field in PANEL_INFO_FIELDS}}
+    row['sharesOutstanding'] = info.get('sharesOutstanding')
+    for statement, fields in PANEL_STATEMENT_FIELDS.items():
+        row.update(_latest_values(getattr(stock, statement), fields))
+
+    # Latest period of the derived statement metrics
+    derived = compute_derived_metrics(stock.balance_sheet, stock.financials, stock.cashflow, info.get('marketCap'))
+    if not derived.empty:
+        row.update(derived.iloc[:, 0].to_dict())
+    return row
+
+
+def panel_from_rows(rows):
+    """DataFrame of ticker x field from panel_row outputs, metrics converted to numbers"""
+    rows = [row for row in rows if row is not None]
+    if not rows:
+        return pd.DataFrame(columns=PANEL_INFO_FIELDS)
+
+    panel = pd.DataFrame(rows).set_index('ticker')
+    metrics = panel.columns.difference(LABEL_COLUMNS)
+    panel[metrics] = panel[metrics].apply(pd.to_numeric, errors='coerce')
+    return panel
+
+
+def build_panel(tickers, max_workers=8):
+    """
+    Assemble info fields and latest statement metrics for many tickers into one table.
+
+    :param tickers: Iterable of ticker symbols.
+    :param max_workers: Number of tickers fetched concurrently.
+    :return: DataFrame of ticker x field.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        rows = list(executor.map(lambda ticker: panel_row(yf.Ticker(ticker)), tickers))
+
+    return panel_from_rows(rows)
+
+
+def add_group_stats(panel, metrics, by='sector'):
+    """
+    Add percentile ('<metric> pct') and z-score ('<metric> z') columns within each group.
+
+    :param panel: Output of build_panel.
+    :param metrics: Metric columns to rank.
+    :param by: 'sector' or 'industry'.
+    """
+    grouped = panel.groupby(by)[metrics]
+    percentiles = grouped.rank(pct=True).add_suffix(' pct')
+    z_scores = ((panel[metrics] - grouped.transform('mean')) / grouped.transform('std')).add_suffix(' z')
+    return panel.join([percentiles, z_scores])
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def cached_panel(tickers):
+    """build_panel cached per universe (pass a tuple so it can be hashed)"""
+    return build_panel(tickers)
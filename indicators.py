@@ -0,0 +1,114 @@
+import pandas as pd
+
+
+# Chart ranges -> how far back from the last bar they reach (None = everything)
+PERIOD_OFFSETS = {
+    '1mo': pd.DateOffset(months=1),
+    '3mo': pd.DateOffset(months=3),
+    '6mo': pd.DateOffset(months=6),
+    '1y': pd.DateOffset(years=1),
+    '2y': pd.DateOffset(years=2),
+    '5y': pd.DateOffset(years=5),
+    '10y': pd.DateOffset(years=10),
+    'max': None,
+}
+
+# Bar sizes tried in order until the chart fits in max_points (weeks start on Monday)
+RESAMPLE_RULES = [None, 'W-MON', 'MS', 'QS']
+
+OHLC_AGGREGATION = {
+    'Open': 'first',
+    'High': 'max',
+    'Low': 'min',
+    'Close': 'last',
+    'Volume': 'sum',
+}
+
+
+# Manual RSI calculation
+def calculate_rsi(series, period=14):
+    """Calculate RSI manually using pandas (works column-wise on DataFrames too)"""
+    delta = series.diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
+    rs = gain / loss
+    rsi = 100 - (100 / (1 + rs))
+    return rsi
+
+
+def technical_indicators(df):
+    """Add the screener indicators (50/200 MA, RSI, 50-day volume MA) to OHLCV data"""
+    df = df.copy()
+
+    # Calculate moving averages
+    df['50_MA'] = df['Close'].rolling(window=50).mean()
+    df['200_MA'] = df['Close'].rolling(window=200).mean()
+
+    # Calculate RSI manually
+    df['RSI'] = calculate_rsi(df['Close'], period=14)
+
+    # Calculate volume moving average
+    df['50_Volume_MA'] = df['Volume'].rolling(window=50).mean()
+
+    return df
+
+
+def latest_indicators(close, volume):
+    """
+    Screener indicators on the last bar for many tickers at once.
+
+    :param close: DataFrame of daily closes, one column per ticker (date-aligned, NaN padded).
+    :param volume: DataFrame of daily volumes with the same shape.
+    :return: DataFrame of ticker x (Close, 50_MA, 200_MA, RSI, Volume, 50_Volume_MA, Bars).
+    """
+    return pd.DataFrame({
+        'Close': close.ffill().iloc[-1],
+        '50_MA': close.rolling(window=50).mean().iloc[-1],
+        '200_MA': close.rolling(window=200).mean().iloc[-1],
+        'RSI': calculate_rsi(close, period=14).iloc[-1],
+        'Volume': volume.iloc[-1],
+        '50_Volume_MA': volume.rolling(window=50).mean().iloc[-1],
+        'Bars': close.notna().sum(),
+    })
+
+
+def add_overlays(df, moving_averages=(50, 200)):
+    """Add moving averages of Close (MA<n> columns) to daily OHLCV data"""
+    df = df.copy()
+    for window in moving_averages:
+        df[f'MA{window}'] = df['Close'].rolling(window=window).mean()
+    return df
+
+
+def window(df, period):
+    """Slice the last period (a PERIOD_OFFSETS key) of a date-indexed frame"""
+    offset = PERIOD_OFFSETS[period]
+    if offset is None or df.empty:
+        return df
+    return df[df.index > df.index[-1] - offset]
+
+
+def resample_ohlc(df, rule):
+    """
+    Resample OHLCV data to larger bars (e.g. 'W-MON', 'MS').
+
+    Bars are labelled by the start of their period like yfinance, never by a future period end.
+    Overlay columns (moving averages...) keep their last value in each bar.
+    """
+    if rule is None or df.empty:
+        return df
+    aggregation = {column: OHLC_AGGREGATION.get(column, 'last') for column in df.columns}
+    return df.resample(rule, label='left', closed='left').agg(aggregation).dropna(subset=['Close'])
+
+
+def downsample(df, max_points=800):
+    """
+    Pick the finest bar size that keeps the number of bars under max_points.
+
+    :return: (resampled frame, rule used or None for the original bars)
+    """
+    for rule in RESAMPLE_RULES:
+        resampled = resample_ohlc(df, rule)
+        if len(resampled) <= max_points:
+            return resampled, rule
+    return resampled, rule
@@ -1,11 +1,19 @@
 from db import create_db, add_stock, remove_stock, get_all_stocks_from_db
-from Ticker_data import safe_round
-from dcf import dcf
+from valuation_cache import cached_dcf, last_valuations
+from dcf import dcf_rates
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 import streamlit as st
+import logging
+import time
+import numpy as np
 import pandas as pd
 import fmp_client as yf
 
 
+# Parallel ticker loads and how long one ticker may take before it is skipped
+MAX_WORKERS = 8
+TICKER_TIMEOUT = 20
+
 create_db()
 
 # Add stock function
@@ -25,75 +33,142 @@ def remove_stock_from_db():
         remove_stock(ticker)
         st.success(f"Removed {ticker} from your list.")
 
-# Display stock table with color coding for undervalued/overvalued
-def display_stocks_table():
-    stocks = get_all_stocks_from_db()
+# Fetch one portfolio row (runs in a worker thread, so rates are passed in)
+def load_stock_row(ticker, rates):
+    ystock = yf.Ticker(ticker)
+    info = ystock.info
+    cashflow = ystock.cashflow
 
-    if stocks:
-        data = []
-        for stock in stocks:
-            ticker = stock[0]
-
-            ystock = yf.Ticker(ticker)
-            info = ystock.info
-            cashflow = ystock.cashflow
-
-            current_price = info.get("currentPrice", 0)
-
-            try:
-                free_cash_flow_data = cashflow.loc['Free Cash Flow'].tail(4)
-                free_cash_flow = [
-                    safe_round(item) for item in free_cash_flow_data if item is not None
-                ]
-                free_cash_flow.reverse()
-                dcf_value = dcf(free_cash_flow, info.get('sharesOutstanding', 0))
-            except (KeyError, IndexError):
-                dcf_value = 0
-
-            row = {
-                "Stock Ticker": ticker,
-                "Current Price": f"${current_price:,.2f}",
-                "DCF Price": f"${dcf_value:,.2f}",
-            }
-            data.append(row)
-        
-        # Create the dataframe
-        df = pd.DataFrame(data)
-
-        df.index = df.index + 1
-
-        # Apply color based on the price
-        def color_row(row):
-            styles = [''] * len(row)
-            current_price = float(row["Current Price"].strip('$').replace(',', ''))
-            dcf_value = float(row["DCF Price"].strip('$').replace(',', ''))
-            
-            if current_price < dcf_value:
-                styles[1] = 'background-color: lime'
-            else:
-                styles[1] = 'background-color: lightcoral'
-            
-            return styles
-
-        # Add hyperlinks for tickers
-        df["Stock Ticker"] = df["Stock Ticker"].apply(
-            lambda x: f'<a href="Charts?ticker={x}">{x}</a>'
-        )
+    current_price = info.get("currentPrice", 0)
 
-        # Style the DataFrame
-        styled_df = (
-            df.style.apply(color_row, axis=1)
-            .set_properties(subset=["Stock Ticker"], **{"text-decoration": "none"})  # Prevent hyperlink formatting issues
-        )
+    # Only recomputed when the statement period, share count or rates changed
+    try:
+        dcf_value = cached_dcf(ticker, cashflow, info.get('sharesOutstanding', 0), rates)
+    except (KeyError, IndexError, ValueError):
+        # Missing, not zero: shown as n/a and sorted last instead of as a -100% upside
+        dcf_value = np.nan
 
-        # Render with HTML
-        st.write(
-            styled_df.to_html(escape=False),
-            unsafe_allow_html=True,
-        )
+    return {
+        "Stock Ticker": ticker,
+        "Current Price": current_price,
+        "DCF Price": dcf_value,
+        "Status": "ok",
+    }
 
-    else:
+
+# Numeric portfolio frame (prices stay floats until rendering)
+def portfolio_frame(data):
+    df = pd.DataFrame(data, columns=["Stock Ticker", "Current Price", "DCF Price", "Status"])
+    df[["Current Price", "DCF Price"]] = df[["Current Price", "DCF Price"]].astype(float)
+    df["Upside"] = (df["DCF Price"] / df["Current Price"] - 1).where(df["Current Price"] > 0)
+    return df
+
+
+# Render the stock table with color coding for undervalued/overvalued
+def render_stocks_table(data, placeholder):
+    df = portfolio_frame(data)
+
+    # Sorting and filtering work on the numeric columns
+    if st.session_state.get("only_undervalued"):
+        df = df[df["Upside"] > 0]
+    df = df.sort_values(
+        st.session_state.get("sort_by", "Upside"),
+        ascending=st.session_state.get("sort_ascending", False),
+        na_position="last",
+    ).reset_index(drop=True)
+
+    df.index = df.index + 1
+
+    # Color based on the price, one vectorized comparison for the whole column
+    price_colors = np.where(
+        (df["Status"] != "ok") | df["DCF Price"].isna(), '',
+        np.where(df["Current Price"] < df["DCF Price"], 'background-color: lime', 'background-color: lightcoral'),
+    )
+
+    # Add hyperlinks for tickers
+    df["Stock Ticker"] = '<a href="Charts?ticker=' + df["Stock Ticker"] + '">' + df["Stock Ticker"] + '</a>'
+
+    # Status only matters when something failed
+    if (df["Status"] == "ok").all():
+        df = df.drop(columns="Status")
+
+    # Style the DataFrame; formatting happens only here
+    styled_df = (
+        df.style.apply(lambda _: price_colors, subset=["Current Price"])
+        .format({"Current Price": "${:,.2f}", "DCF Price": "${:,.2f}", "Upside": "{:+.1%}"}, na_rep="n/a")
+        .set_properties(subset=["Stock Ticker"], **{"text-decoration": "none"})  # Prevent hyperlink formatting issues
+    )
+
+    # Render with HTML
+    placeholder.write(
+        styled_df.to_html(escape=False),
+        unsafe_allow_html=True,
+    )
+
+
+def failed_row(ticker, reason):
+    return {"Stock Ticker": ticker, "Current Price": np.nan, "DCF Price": np.nan, "Status": reason}
+
+
+# Load the portfolio in parallel, showing rows as they arrive
+def display_stocks_table():
+    stocks = get_all_stocks_from_db()
+
+    if not stocks:
         st.write("No stocks in the list.")
+        return
+
+    tickers = [stock[0] for stock in stocks]
+    rates = dcf_rates()
+    progress = st.progress(0.0, text=f"Loaded 0/{len(tickers)}")
+    placeholder = st.empty()
+
+    # Kept in session state so an interrupted load can still show what it got
+    data = st.session_state.portfolio_rows = []
+    st.session_state.portfolio_complete = False
+    started = {}
+
+    def load(ticker):
+        # The clock starts when a worker picks the ticker up, not while it waits in the queue
+        started[ticker] = time.monotonic()
+        return load_stock_row(ticker, rates)
+
+    executor = ThreadPoolExecutor(max_workers=MAX_WORKERS)
+    try:
+        futures = {executor.submit(load, ticker): ticker for ticker in tickers}
+        pending = set(futures)
+
+        while pending:
+            done, pending = wait(pending, timeout=0.25, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    data.append(future.result())
+                except Exception as e:
+                    logging.error(f"Error loading {futures[future]}: {e}")
+                    data.append(failed_row(futures[future], "error"))
+
+            # A slow ticker is given up on without holding back the others; its worker is freed
+            # once the request in flight hits REQUEST_TIMEOUT
+            now = time.monotonic()
+            timed_out = {f for f in pending if now - started.get(futures[f], now) > TICKER_TIMEOUT}
+            for future in timed_out:
+                logging.warning(f"Timed out loading {futures[future]}")
+                data.append(failed_row(futures[future], "timed out"))
+            pending -= timed_out
+
+            if done or timed_out:
+                render_stocks_table(data, placeholder)
+            progress.progress(len(data) / len(tickers), text=f"Loaded {len(data)}/{len(tickers)}")
+    finally:
+        # Also runs when a Cancel click or any other widget interrupts the script
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    st.session_state.portfolio_complete = True
+    progress.empty()
+
+
+def cancel_load():
+    st.session_state.portfolio_cancelled = True
 
 # Page layout
 st.title("Stock Portfolio")
@@ -117,15 +192,49 @@ st.divider()
 st.header("Portfolio Valuation")
 st.info("⚠️ Loading portfolio will consume API calls. Use cache when possible.")
 
+col1, col2, col3 = st.columns(3)
+with col1:
+    st.selectbox("Sort by", ["Upside", "Stock Ticker", "Current Price", "DCF Price"], key="sort_by")
+with col2:
+    st.checkbox("Ascending", key="sort_ascending")
+with col3:
+    st.checkbox("Only undervalued", key="only_undervalued")
+
+# Only a click loads: any other rerun (Cancel, sort controls, leaving the page) keeps the rows loaded so far
 if st.button("📊 Load Portfolio & Calculate DCF", type="primary"):
-    with st.spinner("Loading portfolio data..."):
-        display_stocks_table()
+    # Clicking Cancel interrupts the running load; the rerun lands in the else branch
+    cancel = st.empty()
+    cancel.button("⏹️ Cancel", on_click=cancel_load)
+    display_stocks_table()
+    cancel.empty()
 else:
+    rows = st.session_state.get("portfolio_rows", [])
+    complete = st.session_state.get("portfolio_complete", True)
+    if st.session_state.pop("portfolio_cancelled", False) and not complete:
+        st.warning(f"Loading cancelled after {len(rows)} stocks.")
+    elif rows and not complete:
+        st.warning(f"Loading was interrupted after {len(rows)} stocks, click Load to reload.")
+
+    # Re-sorting / filtering the last loaded table needs no API calls
+    if rows:
+        st.write("**Last loaded portfolio:**")
+        render_stocks_table(rows, st.empty())
+
     # Show list of stocks without making API calls
     stocks = get_all_stocks_from_db()
     if stocks:
         st.write(f"**{len(stocks)} stocks in portfolio:**")
         stock_list = ", ".join([stock[0] for stock in stocks])
         st.code(stock_list)
+
+        # Last computed valuations are stored locally, no API calls needed
+        valuations = last_valuations()
+        last = pd.DataFrame(
+            [(stock[0], *valuations[stock[0]]) for stock in stocks if stock[0] in valuations],
+            columns=["Stock Ticker", "Last DCF Price", "Computed At (UTC)"],
+        )
+        if not last.empty:
+            st.write("**Last computed valuations:**")
+            st.dataframe(last.style.format({"Last DCF Price": "${:,.2f}"}), hide_index=True)
     else:
         st.write("No stocks in portfolio.")
\ No newline at end of file
@@ -1,38 +1,77 @@
 import fmp_client as yf
 import streamlit as st
 import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+from indicators import PERIOD_OFFSETS, add_overlays, window, downsample
 
 
 st.set_page_config(layout="wide")
 
+# Upper bound on bars sent to the browser; longer ranges get weekly / monthly bars
+MAX_POINTS = 800
+
+BAR_LABELS = {None: "Daily", 'W-MON': "Weekly", 'MS': "Monthly", 'QS': "Quarterly"}
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def load_history(ticker):
+    """Full daily history with overlays, computed once per ticker"""
+    stock = yf.Ticker(ticker)
+    return add_overlays(stock.history(interval='1d', period='max'))
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def chart_data(ticker, period, max_points):
+    # Overlays are computed on the full history so moving averages are valid from the first visible bar
+    return downsample(window(load_history(ticker), period), max_points)
+
+
 stock_ticker = st.session_state.get("ticker", "MSFT")
 
-ticker = st.text_input("Enter stock ticker", placeholder="e.g., MSFT", value=stock_ticker)
+col1, col2 = st.columns([3, 1])
+with col1:
+    ticker = st.text_input("Enter stock ticker", placeholder="e.g., MSFT", value=stock_ticker)
+with col2:
+    period = st.selectbox("Range", list(PERIOD_OFFSETS), index=list(PERIOD_OFFSETS).index('1y'))
+
 if ticker:
     st.session_state.ticker = ticker
     stock_ticker = ticker
 
 try:
-    stock = yf.Ticker(stock_ticker)
-    df = stock.history(interval='1d',period='1y')
+    df, rule = chart_data(stock_ticker.upper(), period, MAX_POINTS)
 except Exception as e:
     st.write(f"Error fetching stock data: {e}")
+    st.stop()
+
+if df.empty:
+    st.warning(f"No price history for {stock_ticker}")
+    st.stop()
 
-fig = go.Figure(data=[go.Candlestick(
+fig = make_subplots(rows=2, cols=1, shared_xaxes=True, row_heights=[0.8, 0.2], vertical_spacing=0.03)
+
+fig.add_trace(go.Candlestick(
     x=df.index,
     open=df['Open'],
     high=df['High'],
     low=df['Low'],
     close=df['Close'],
     name=stock_ticker
-)])
+), row=1, col=1)
+
+for column in [c for c in df.columns if c.startswith('MA')]:
+    fig.add_trace(go.Scatter(x=df.index, y=df[column], name=column, line={'width': 1}), row=1, col=1)
+
+fig.add_trace(go.Bar(x=df.index, y=df['Volume'], name='Volume', marker_color='lightgray'), row=2, col=1)
 
 # Set layout options
 fig.update_layout(
-    title=f"{stock_ticker} Stock Price",
-    xaxis_title="Date",
-    yaxis_title="Price (USD)",
-    xaxis_rangeslider_visible=False
+    title=f"{stock_ticker} Stock Price ({BAR_LABELS[rule]} bars)",
+    xaxis_rangeslider_visible=False,
+    height=700,
 )
+fig.update_xaxes(title_text="Date", row=2, col=1)
+fig.update_yaxes(title_text="Price (USD)", row=1, col=1)
+fig.update_yaxes(title_text="Volume", row=2, col=1)
 
-st.plotly_chart(fig)
\ No newline at end of file
+st.plotly_chart(fig)
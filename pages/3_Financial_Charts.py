@@ -1,11 +1,25 @@
 import fmp_client as yf
 import streamlit as st
-import pandas as pd
-import logging
+from derived_metrics import STATEMENT_PREFIXES, build_metric_frame
 
 
 st.set_page_config(layout="wide")
 
+
+# Built once per ticker; picking metrics only selects columns
+@st.cache_data(ttl=86400, show_spinner=False)
+def load_metric_frame(ticker):
+    stock = yf.Ticker(ticker)
+    statements = {
+        'balance_sheet': stock.balance_sheet,
+        'financials': stock.financials,
+        'cashflow': stock.cashflow,
+    }
+    # Number of periods per statement, 0 when not available
+    periods = {name: (0 if statement.empty else statement.shape[1]) for name, statement in statements.items()}
+    return build_metric_frame(**statements), periods
+
+
 if "ticker" in st.session_state:
     stock_ticker = st.session_state.get("ticker", "MSFT")
 elif "ticker" in st.query_params:
@@ -18,11 +32,7 @@ if not stock_ticker:
     st.stop()
 
 try:
-    stock = yf.Ticker(stock_ticker)
-    balance_sheet = stock.balance_sheet
-    financials = stock.financials
-    cashflow = stock.cashflow
-
+    metrics, periods = load_metric_frame(stock_ticker.upper())
 except Exception as e:
     st.error(f"Error fetching stock data: {e}")
     st.stop()
@@ -31,77 +41,56 @@ except Exception as e:
 st.info(f"**Data availability for {stock_ticker}:**")
 col1, col2, col3 = st.columns(3)
 with col1:
-    if balance_sheet.empty:
+    if not periods['balance_sheet']:
         st.error("❌ Balance Sheet: Not available")
     else:
-        st.success(f"✅ Balance Sheet: {balance_sheet.shape[1]} periods")
+        st.success(f"✅ Balance Sheet: {periods['balance_sheet']} periods")
 with col2:
-    if financials.empty:
+    if not periods['financials']:
         st.error("❌ Income Statement: Not available")
     else:
-        st.success(f"✅ Income Statement: {financials.shape[1]} periods")
+        st.success(f"✅ Income Statement: {periods['financials']} periods")
 with col3:
-    if cashflow.empty:
+    if not periods['cashflow']:
         st.error("❌ Cash Flow: Not available")
     else:
-        st.success(f"✅ Cash Flow: {cashflow.shape[1]} periods")
+        st.success(f"✅ Cash Flow: {periods['cashflow']} periods")
 
 # Check if all dataframes are empty
-if balance_sheet.empty and financials.empty and cashflow.empty:
+if metrics.empty:
     st.error(f"No financial data available for {stock_ticker}. Free tier may not support this stock.")
     st.stop()
 
 st.divider()
 
-# Convert DataFrame to plot-friendly format (only if not empty)
-if not balance_sheet.empty:
-    balance_sheet = balance_sheet.T
-    if len(balance_sheet.index) > 0:
-        balance_sheet.index = pd.to_datetime(balance_sheet.index)
-        balance_sheet.index = balance_sheet.index.strftime('%Y-%m-%d')
-
-if not financials.empty:
-    financials = financials.T
-    if len(financials.index) > 0:
-        financials.index = pd.to_datetime(financials.index)
-        financials.index = financials.index.strftime('%Y-%m-%d')
-
-if not cashflow.empty:
-    cashflow = cashflow.T
-    if len(cashflow.index) > 0:
-        cashflow.index = pd.to_datetime(cashflow.index)
-        cashflow.index = cashflow.index.strftime('%Y-%m-%d')
 
-# logging.info(dir(cashflow))
-# logging.info(cashflow.columns)
+def statement_metrics(name):
+    prefix = f"{STATEMENT_PREFIXES[name]}: "
+    return [column for column in metrics.columns if column.startswith(prefix)]
 
 
 financials_metrics = st.multiselect(
     "Financials Metrics",
-    financials.columns if not financials.empty else [],
+    statement_metrics('financials'),
+    format_func=lambda column: column.split(": ", 1)[1],
 )
 
 balance_sheet_metrics = st.multiselect(
     "Balance Sheet Metrics",
-    balance_sheet.columns if not balance_sheet.empty else [],
+    statement_metrics('balance_sheet'),
+    format_func=lambda column: column.split(": ", 1)[1],
 )
 
 cashflow_metrics = st.multiselect(
     "CashFlow Metrics",
-    cashflow.columns if not cashflow.empty else [],
+    statement_metrics('cashflow'),
+    format_func=lambda column: column.split(": ", 1)[1],
 )
 
 elements = sorted(balance_sheet_metrics + cashflow_metrics + financials_metrics)
 
 if len(elements) > 0:
-    for element in elements:
-        st.subheader(element)
-        try:
-            st.line_chart(cashflow[element])
-        except KeyError:
-            try:
-                st.line_chart(balance_sheet[element][-10:], use_container_width=True)
-            except KeyError:
-                st.line_chart(financials[element])
+    # All selected metrics in one chart
+    st.line_chart(metrics[elements], use_container_width=True)
 else:
-    st.warning(f"Pick metrics to chart for {stock_ticker}!")
\ No newline at end of file
+    st.warning(f"Pick metrics to chart for {stock_ticker}!")
@@ -1,5 +1,7 @@
 import streamlit as st
 import fmp_client as yf
+from derived_metrics import RATIO_CATEGORIES, format_derived_metrics
+from ratio_store import load_ratios, refresh_ratios
 
 
 st.set_page_config(layout="wide")
@@ -8,29 +10,37 @@ if "ticker" not in st.session_state:
     st.session_state.ticker = ""
 
 ticker = st.text_input(
-    "Enter stock ticker", 
-    placeholder="e.g., MSFT", 
-    value=st.session_state.ticker, 
+    "Enter stock ticker",
+    placeholder="e.g., MSFT",
+    value=st.session_state.ticker,
     key="ticker"
 )
 
 if ticker:
-    stock = yf.Ticker(ticker)
-
-    info = stock.info
-    balance_sheet = stock.balance_sheet
-    financials = stock.financials
-    cashflow = stock.cashflow
-
-    # st.subheader(f":coffee: {info.get('longName', ticker)}")
-
-    # table_header = """
-    # <table style="width:100%; border-collapse:collapse;">
-    # <thead>
-    # <tr style="border-bottom:2px solid black;">
-    # <th style="text-align:left;">Metric</th>
-    # <th style="text-align:left;">Value</th>
-    # </tr>
-    # </thead>
-    # <tbody>
-    # """
\ No newline at end of file
+    # Ratios are precomputed when statements are refreshed; opening the page is a local read
+    ratios, computed_at = load_ratios(ticker)
+
+    col1, col2 = st.columns([4, 1])
+    with col2:
+        refresh = st.button("🔄 Refresh from statements")
+
+    if refresh or ratios.empty:
+        with st.spinner(f"Computing ratios for {ticker.upper()}..."):
+            refresh_ratios(yf.Ticker(ticker))
+        ratios, computed_at = load_ratios(ticker)
+
+    if ratios.empty:
+        st.error(f"No statement data available for {ticker.upper()}.")
+        st.stop()
+
+    with col1:
+        st.subheader(f":coffee: {ticker.upper()} Key Metrics")
+        st.caption(f"Computed at {computed_at} UTC")
+
+    for category, metrics in RATIO_CATEGORIES.items():
+        st.subheader(f":sparkles: {category}")
+        table = ratios.reindex([metric for metric in metrics if metric in ratios.index])
+        if table.empty:
+            st.write("Not available.")
+        else:
+            st.dataframe(format_derived_metrics(table), use_container_width=True)
@@ -1,56 +1,39 @@
+import time
 import fmp_client as yf
 import streamlit as st
 import pandas as pd
+from compute_service import get_compute_service, current_user, TooManyJobs
 
 # Define the stock symbols to check
 symbols = ['AAPL', 'MSFT', 'GOOGL', 'AMZN', 'TSLA']
 
-# Manual RSI calculation
-def calculate_rsi(series, period=14):
-    """Calculate RSI manually using pandas"""
-    delta = series.diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-    rs = gain / loss
-    rsi = 100 - (100 / (1 + rs))
-    return rsi
 
-# Function to calculate indicators
-def get_technical_indicators(stock):
-    df = yf.download(stock, period="6mo", interval="1d")
+# Price data is fetched here, the indicator math runs in the compute service
+def load_prices(stocks):
+    history = {stock: yf.download(stock, period="1y", interval="1d") for stock in stocks}
+    close = pd.DataFrame({stock: df['Close'] for stock, df in history.items()})
+    volume = pd.DataFrame({stock: df['Volume'] for stock, df in history.items()})
+    return close, volume
 
-    # Calculate moving averages
-    df['50_MA'] = df['Close'].rolling(window=50).mean()
-    df['200_MA'] = df['Close'].rolling(window=200).mean()
-
-    # Calculate RSI manually
-    df['RSI'] = calculate_rsi(df['Close'], period=14)
-
-    # Calculate volume moving average
-    df['50_Volume_MA'] = df['Volume'].rolling(window=50).mean()
-
-    return df
 
 # Function to check if the stock meets the rules
-def check_stock(stock):
-    df = get_technical_indicators(stock)
-
+def check_stock(stock, row):
     # Check if we have enough data
-    if df.empty or len(df) < 200:
+    if row['Bars'] < 200:
         st.warning(f"⚠️ {stock}: Not enough data (need 200+ days)")
         return
 
     # Check if indicators are calculated (not NaN)
-    if pd.isna(df['50_MA'].iloc[-1]) or pd.isna(df['200_MA'].iloc[-1]) or pd.isna(df['RSI'].iloc[-1]):
+    if pd.isna(row['50_MA']) or pd.isna(row['200_MA']) or pd.isna(row['RSI']):
         st.warning(f"⚠️ {stock}: Indicators not calculated (insufficient data)")
         return
 
     # Check if in an uptrend (50-day MA above 200-day MA)
-    if df['50_MA'].iloc[-1] > df['200_MA'].iloc[-1]:
+    if row['50_MA'] > row['200_MA']:
         # Check if RSI is not overbought (below 70)
-        if df['RSI'].iloc[-1] < 70:
+        if row['RSI'] < 70:
             # Check for recent volume increase
-            if df['Volume'].iloc[-1] > df['50_Volume_MA'].iloc[-1]:
+            if row['Volume'] > row['50_Volume_MA']:
                 st.success(f"✅ {stock}: Meets criteria - potential buy")
             else:
                 st.info(f"📊 {stock}: No volume confirmation")
@@ -64,9 +47,27 @@ st.write("Screening stocks for: Uptrend (50MA > 200MA), RSI < 70, Volume confirm
 
 st.divider()
 
+# Submit the screen once per session and poll the future on reruns
+if "screener_job" not in st.session_state:
+    close, volume = load_prices(symbols)
+    if close.empty:
+        st.warning("No price data available for the screener symbols")
+        st.stop()
+    try:
+        st.session_state.screener_job = get_compute_service().submit_screen(current_user(), close, volume)
+    except TooManyJobs as e:
+        st.warning(f"⏳ {e}")
+        st.stop()
+
+job = st.session_state.screener_job
+if not job.done():
+    st.info("⏳ Computing indicators...")
+    time.sleep(0.5)
+    st.rerun()
+
+del st.session_state.screener_job
+indicators = job.result()
+
 # Run the checks for all stocks
 for symbol in symbols:
-    check_stock(symbol)
-
-
-
+    check_stock(symbol, indicators.loc[symbol])
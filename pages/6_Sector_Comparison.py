@@ -0,0 +1,63 @@
+from db import create_db, get_all_stocks_from_db
+from fundamentals_panel import cached_panel, add_group_stats, LABEL_COLUMNS
+from valuation_models import evaluate_models
+import streamlit as st
+
+
+st.set_page_config(layout="wide")
+st.title("Sector Comparison")
+
+create_db()
+
+# Default universe is the portfolio
+portfolio = ", ".join(stock[0] for stock in get_all_stocks_from_db())
+universe = st.text_area("Tickers (comma separated)", value=portfolio, placeholder="e.g., AAPL, MSFT, GOOGL")
+tickers = tuple(sorted({t.strip().upper() for t in universe.split(",") if t.strip()}))
+
+if not tickers:
+    st.warning("Add some tickers to compare")
+    st.stop()
+
+st.info("⚠️ Building the panel consumes API calls for tickers not in cache.")
+
+with st.spinner(f"Loading {len(tickers)} tickers..."):
+    panel = cached_panel(tickers)
+
+if panel.empty:
+    st.error("No data available for these tickers.")
+    st.stop()
+
+col1, col2, col3 = st.columns(3)
+with col1:
+    group_by = st.selectbox("Group by", ["sector", "industry"])
+with col2:
+    metrics = [column for column in panel.columns if column not in LABEL_COLUMNS]
+    metric = st.selectbox(
+        "Metric",
+        metrics,
+        index=metrics.index("priceToSalesTrailing12Months") if "priceToSalesTrailing12Months" in metrics else 0,
+    )
+with col3:
+    cheapest_first = st.checkbox("Lowest first", value=True)
+
+table = add_group_stats(panel, [metric], by=group_by)
+table = table.sort_values([group_by, metric], ascending=[True, cheapest_first])
+
+st.dataframe(
+    table[["longName", group_by, metric, f"{metric} pct", f"{metric} z"]],
+    use_container_width=True,
+)
+
+st.divider()
+
+# All valuation models for the whole universe in one pass
+st.subheader("Valuation Models")
+valuations = evaluate_models(panel)
+st.dataframe(
+    panel[["currentPrice"]].join(valuations).style.format(
+        {column: "{:,.2f}" for column in ["currentPrice", *valuations.columns.drop("Implied Growth")]}
+        | {"Implied Growth": "{:.2%}"},
+        na_rep="-",
+    ),
+    use_container_width=True,
+)
@@ -0,0 +1,88 @@
+from db import create_db, get_all_stocks_from_db
+from dcf import dcf_rates
+from backtest import load_data, build_grid, run_backtest
+from compute_service import get_compute_service, current_user, TooManyJobs
+import streamlit as st
+import time
+
+
+st.set_page_config(layout="wide")
+# Same ranges as the sidebar sliders
+SWEEP_RATES = {
+    'required_rates': [r / 100 for r in range(5, 13)],
+    'perpetual_rates': [p / 100 for p in range(1, 4)],
+    'growth_rates': [g / 100 for g in range(2, 11)],
+}
+
+st.title("DCF Backtest")
+st.write("Point-in-time DCF (statements filed before each date only) compared with the forward 1Y return.")
+
+create_db()
+
+
+@st.cache_data(ttl=86400, show_spinner=False)
+def cached_data(tickers):
+    return load_data(tickers)
+
+
+portfolio = ", ".join(stock[0] for stock in get_all_stocks_from_db())
+universe = st.text_area("Tickers (comma separated)", value=portfolio, placeholder="e.g., AAPL, MSFT, GOOGL")
+tickers = tuple(sorted({t.strip().upper() for t in universe.split(",") if t.strip()}))
+
+if not tickers:
+    st.warning("Add some tickers to backtest")
+    st.stop()
+
+with st.spinner(f"Loading {len(tickers)} tickers..."):
+    statements, prices = cached_data(tickers)
+
+if statements.empty or prices.empty:
+    st.error("No statement or price history available for these tickers.")
+    st.stop()
+
+# One evaluation date per year, on the last trading day
+dates = prices.groupby(prices['date'].dt.year)['date'].max()
+grid = build_grid(statements, prices, dates)
+
+if grid.empty:
+    st.error("Not enough history: need statements filed at least one year before the latest price.")
+    st.stop()
+
+# Rates from the sidebar on the Ticker data page
+rates = dcf_rates()
+result, stats = run_backtest(grid, rates)
+
+st.subheader(f"Current rates: required {rates[0]:.0%}, perpetual {rates[1]:.0%}, growth {rates[2]:.0%}")
+st.dataframe(stats.reset_index(drop=True), hide_index=True)
+
+with st.expander("Ticker-years"):
+    st.dataframe(result, hide_index=True)
+
+st.subheader("Rate sweep")
+
+# The sweep runs in the compute pool, once per universe; reruns poll the future
+sweeps = st.session_state.setdefault("backtest_sweeps", {})
+if tickers not in sweeps:
+    job_tickers, job = st.session_state.get("backtest_sweep_job", (None, None))
+    if job_tickers != tickers:
+        try:
+            job = get_compute_service().submit_sweep(current_user(), grid, **SWEEP_RATES)
+        except TooManyJobs as e:
+            st.warning(f"⏳ {e}")
+            st.stop()
+        st.session_state.backtest_sweep_job = (tickers, job)
+
+    if not job.done():
+        st.info("⏳ Sweeping rates...")
+        time.sleep(0.5)
+        st.rerun()
+
+    del st.session_state.backtest_sweep_job
+    sweeps[tickers] = job.result()
+
+sweep = sweeps[tickers]
+metric = st.selectbox("Metric", ["rank_ic", "spread", "hit_rate"])
+st.dataframe(
+    sweep[metric].unstack('cash_flow_growth_rate').style.format("{:.3f}", na_rep="-"),
+    use_container_width=True,
+)
@@ -0,0 +1,47 @@
+import pandas as pd
+import streamlit as st
+from alerts import RULE_TYPES, add_rule, load_rules, refresh
+from db import get_alerts
+
+
+st.set_page_config(layout="wide")
+st.title("🔔 Alerts")
+
+col1, col2 = st.columns([4, 1])
+with col2:
+    # Normally run by the scheduled refresh (python alerts.py run)
+    if st.button("🔄 Check watchlist now"):
+        with st.spinner("Checking the watchlist for new data..."):
+            fired = refresh()
+        st.success(f"{len(fired)} new alerts")
+
+with col1:
+    st.subheader("Recent alerts")
+    alerts = pd.DataFrame(get_alerts(), columns=['Ticker', 'Rule', 'Alert', 'Created At'])
+    if alerts.empty:
+        st.write("No alerts yet.")
+    else:
+        st.dataframe(alerts, use_container_width=True, hide_index=True)
+
+st.subheader("Rules")
+st.dataframe(load_rules(), use_container_width=True, hide_index=True)
+
+with st.form("add_rule"):
+    st.write("Add a rule (ticker `*` = every watchlist ticker)")
+    ticker = st.text_input("Ticker", value="*")
+    rule_type = st.selectbox("Type", list(RULE_TYPES))
+    direction = st.selectbox("Direction", ["below", "above"])
+    level = st.number_input("RSI level", value=30.0)
+    margin = st.number_input("DCF margin (fraction below fair value)", value=0.0)
+    metric = st.text_input("Metric (metric change rules)", value="Operating Margin")
+    min_change = st.number_input("Minimum change", value=0.05)
+
+    if st.form_submit_button("Add rule") and ticker:
+        params = {
+            'price_vs_dcf': {'direction': direction, 'margin': margin},
+            'rsi': {'direction': direction, 'level': level},
+            'ma_cross': {'direction': direction},
+            'metric_change': {'metric': metric, 'min_change': min_change},
+        }[rule_type]
+        add_rule(ticker, rule_type, **params)
+        st.rerun()
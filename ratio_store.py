@@ -0,0 +1,62 @@
+import logging
+import pandas as pd
+from db import create_db, save_ratios, get_ratios
+from derived_metrics import compute_ratio_table
+
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+create_db()
+
+
+def refresh_ratios(stock):
+    """
+    Recompute the ratio table of an FMPTicker from its statements and store it.
+
+    :return: The ratio table (metric x period), empty when there are no statements.
+    """
+    balance_sheet, financials, cashflow = stock.balance_sheet, stock.financials, stock.cashflow
+    periods = [c for s in (balance_sheet, financials, cashflow) if not s.empty for c in s.columns]
+    if not periods:
+        return pd.DataFrame()
+
+    # Prices back to the oldest period for the per-period valuation ratios
+    prices = stock.history(start=min(pd.to_datetime(periods)) - pd.Timedelta(days=7))
+    table = compute_ratio_table(balance_sheet, financials, cashflow, prices)
+
+    long = table.stack(future_stack=True).reset_index()
+    long.columns = ['metric', 'period', 'value']
+    rows = [
+        (period.strftime('%Y-%m-%d'), metric, None if pd.isna(value) else float(value))
+        for metric, period, value in long.itertuples(index=False)
+    ]
+    save_ratios(stock.ticker, rows)
+    logging.info(f"Ratios refreshed for {stock.ticker}: {len(table)} metrics x {len(table.columns)} periods")
+    return table
+
+
+def load_ratios(ticker):
+    """
+    Stored ratio table, read locally without any API call.
+
+    :return: (DataFrame of metric x period latest first, computed_at) or (empty DataFrame, None).
+    """
+    rows = get_ratios(ticker.upper())
+    if not rows:
+        return pd.DataFrame(), None
+
+    long = pd.DataFrame(rows, columns=['period', 'metric', 'value', 'computed_at'])
+    table = long.pivot(index='metric', columns='period', values='value')
+    table.columns = pd.to_datetime(table.columns)
+    table = table[sorted(table.columns, reverse=True)]
+    return table, long['computed_at'].max()
+
+
+def ensure_ratios(stock):
+    """Refresh the stored ratios only when the statements have a period the store does not know yet"""
+    if stock.financials.empty:
+        return
+    table, _ = load_ratios(stock.ticker)
+    latest_period = pd.to_datetime(stock.financials.columns).max()
+    if table.empty or latest_period not in table.columns:
+        refresh_ratios(stock)
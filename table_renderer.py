@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+
+
+TABLE_HEADER = """
+<table style="width:100%; border-collapse:collapse;">
+<thead>
+<tr style="border-bottom:2px solid black;">
+<th style="text-align:left;">Metric</th>
+<th style="text-align:left;">Value</th>
+</tr>
+</thead>
+<tbody>
+"""
+
+TABLE_FOOTER = "</tbody></table>"
+
+# Value formats usable in a threshold spec
+FORMATS = {
+    'ratio': lambda value: f"{value:.2f}",
+    'percent': lambda value: f"{value * 100:.2f}%",
+    'raw': str,
+}
+
+
+def _default_format(value):
+    return f"${value:,}" if isinstance(value, (int, float)) and value > 1e3 else str(value)
+
+
+def _in_ranges(values, ranges):
+    """
+    Mask of values falling in any of the ranges.
+
+    Each range is (low, high) or (low, high, inclusive) where None means unbounded and
+    inclusive is passed to Series.between ('neither' by default).
+    """
+    mask = pd.Series(False, index=values.index)
+    for low, high, *inclusive in ranges:
+        mask |= values.between(
+            -np.inf if low is None else low,
+            np.inf if high is None else high,
+            inclusive=inclusive[0] if inclusive else 'neither',
+        )
+    return mask
+
+
+def render_metric_table(values, thresholds=None, skip=()):
+    """
+    Render a Metric / Value HTML table with green / red highlighting.
+
+    :param values: Series of metric name -> value (e.g. the latest column of a statement).
+    :param thresholds: Dict of metric -> {'green': [ranges], 'red': [ranges], 'format': name}.
+    :param skip: Metrics to leave out of the table.
+    :return: HTML string for st.markdown(..., unsafe_allow_html=True).
+    """
+    thresholds = thresholds or {}
+    values = values[~values.index.isin(skip)].fillna(0)
+    numeric = pd.to_numeric(values, errors='coerce')
+
+    # Colors are decided per spec over the whole column, not per row
+    colors = pd.Series('black', index=values.index)
+    formatted = values.map(_default_format)
+    for metric, spec in thresholds.items():
+        rows = values.index == metric
+        if not rows.any():
+            continue
+        metric_values = numeric[rows]
+        colors[rows & _in_ranges(numeric, spec.get('red', [])).to_numpy()] = 'red'
+        colors[rows & _in_ranges(numeric, spec.get('green', [])).to_numpy()] = 'green'
+        if 'format' in spec and metric_values.notna().all():
+            formatted[rows] = metric_values.map(FORMATS[spec['format']])
+
+    metrics = pd.Series(values.index.astype(str), index=values.index)
+    table_rows = (
+        "<tr><td>" + metrics + "</td><td style='color:" + colors
+        + "; font-weight:bold;'>" + formatted + "</td></tr>"
+    )
+
+    return TABLE_HEADER + "".join(table_rows) + TABLE_FOOTER
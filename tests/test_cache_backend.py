@@ -0,0 +1,81 @@
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import pytest
+import requests
+import requests_cache
+import cache_backend
+
+fakeredis = pytest.importorskip('fakeredis')
+
+
+class ProfileHandler(BaseHTTPRequestHandler):
+    """Stand-in for the FMP profile endpoint"""
+
+    def do_GET(self):
+        body = b'[{"symbol": "AAPL", "price": 1.0}]'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def profile_url():
+    server = HTTPServer(('127.0.0.1', 0), ProfileHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}/stable/profile"
+    server.shutdown()
+
+
+@pytest.fixture
+def redis_cache(monkeypatch):
+    monkeypatch.setattr(cache_backend, '_access_log', None)
+    monkeypatch.setattr(cache_backend, '_last_access_write', {})
+    cache = cache_backend.install_cache('redis', connection=fakeredis.FakeRedis())
+    yield cache
+    requests_cache.uninstall_cache()
+
+
+def test_redis_stand_in_serves_cached_responses(redis_cache, profile_url):
+    assert not requests.get(profile_url).from_cache
+
+    response = requests.get(profile_url)
+    assert response.from_cache
+    assert response.json() == [{'symbol': 'AAPL', 'price': 1.0}]
+
+
+def test_access_log_does_not_overwrite_redis_responses(redis_cache, profile_url):
+    response = requests.get(profile_url)
+    cache_backend.record_access(response.cache_key)
+
+    assert requests.get(profile_url).from_cache
+    assert cache_backend.enforce_size_limit(redis_cache) == 0
+
+
+@pytest.fixture
+def file_cache(monkeypatch, tmp_path):
+    monkeypatch.setattr(cache_backend, 'CACHE_NAME', str(tmp_path / 'fmp_cache'))
+    monkeypatch.setattr(cache_backend, '_access_log', None)
+    monkeypatch.setattr(cache_backend, '_last_access_write', {})
+    cache = cache_backend.install_cache('filesystem')
+    yield cache
+    requests_cache.uninstall_cache()
+
+
+def test_filesystem_cache_survives_maintenance(file_cache, profile_url):
+    from cache_maintenance import compact, storage_report, storage_size
+
+    # Startup compaction on an empty cache
+    assert compact(file_cache) == 0
+
+    response = requests.get(profile_url)
+    cache_backend.record_access(response.cache_key)
+
+    assert compact(file_cache) == 0
+    assert requests.get(profile_url).from_cache
+    assert storage_report(file_cache)['responses'].sum() == 1
+    assert storage_size(file_cache) == cache_backend.stored_size(file_cache, file_cache.responses[response.cache_key])
@@ -0,0 +1,96 @@
+import math
+import logging
+import threading
+from collections import OrderedDict
+import pandas as pd
+from db import create_db, save_valuation, get_valuation, get_valuations
+from dcf import dcf, dcf_rates
+
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Max number of (ticker, inputs) results kept in memory
+CACHE_SIZE = 1024
+
+_memo = OrderedDict()
+_lock = threading.Lock()
+
+create_db()
+
+
+# Helper function to handle NaN values
+def safe_round(value):
+    return round(value) if value and not math.isnan(value) else None
+
+
+def free_cash_flow_history(cashflow):
+    """
+    Free cash flows used by dcf() (the four latest, most recent last); statements are newest first.
+
+    Missing older periods are left out.
+
+    :raises ValueError: When the latest free cash flow is missing (dcf() projects from it).
+    """
+    free_cash_flow_data = pd.to_numeric(cashflow.loc['Free Cash Flow'].head(4), errors='coerce')
+    if free_cash_flow_data.empty or pd.isna(free_cash_flow_data.iloc[0]):
+        raise ValueError("Latest free cash flow is missing")
+
+    free_cash_flow = [round(item) for item in free_cash_flow_data.dropna()]
+    free_cash_flow.reverse()
+    return free_cash_flow
+
+
+def valuation_key(ticker, period, free_cash_flow, shares, rates):
+    """Identity of a DCF input set: ticker, latest statement period, the FCF it projects, share count and the three rates"""
+    required_rate, perpetual_rate, cash_flow_growth_rate = rates
+    return (
+        f"{ticker}|{period}|{free_cash_flow:.0f}|{shares:.0f}|"
+        f"{required_rate:.4f}|{perpetual_rate:.4f}|{cash_flow_growth_rate:.4f}"
+    )
+
+
+def _remember(key, fair_value):
+    with _lock:
+        _memo[key] = fair_value
+        _memo.move_to_end(key)
+        while len(_memo) > CACHE_SIZE:
+            _memo.popitem(last=False)
+
+
+def cached_dcf(ticker, cashflow, shares, rates=None):
+    """
+    dcf() memoized by inputs; results are also persisted so they survive restarts.
+
+    :param ticker: Ticker symbol.
+    :param cashflow: Cash flow statement as returned by FMPTicker.
+    :param shares: Shares outstanding.
+    :param rates: Optional (required, perpetual, growth) rates as fractions; defaults to the sidebar values.
+    :return: Fair value per share.
+    :raises KeyError, IndexError, ValueError: Same as computing the DCF directly.
+    """
+    rates = rates or dcf_rates()
+    period = str(cashflow.columns[0]) if len(cashflow.columns) else ''
+    free_cash_flow = free_cash_flow_history(cashflow)
+    # Keys without the FCF (valued from the wrong period) never match and get recomputed
+    key = valuation_key(ticker, period, free_cash_flow[-1], shares, rates)
+
+    with _lock:
+        if key in _memo:
+            _memo.move_to_end(key)
+            return _memo[key]
+
+    # Last persisted valuation is still valid if it was computed from the same inputs
+    stored = get_valuation(ticker)
+    if stored and stored[0] == key:
+        _remember(key, stored[1])
+        return stored[1]
+
+    fair_value = dcf(free_cash_flow, shares, rates)
+    _remember(key, fair_value)
+    save_valuation(ticker, key, fair_value)
+    return fair_value
+
+
+def last_valuations():
+    """Last persisted fair value per ticker: {ticker: (fair_value, computed_at)}"""
+    return {ticker: (fair_value, computed_at) for ticker, (_, fair_value, computed_at) in get_valuations().items()}
@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+from dcf import dcf_batch, dcf_rates
+
+
+# Default multiples for the relative valuation models
+EV_EBITDA_MULTIPLE = 12
+PE_MULTIPLE = 15
+
+# Search bounds for the reverse DCF implied growth rate
+IMPLIED_GROWTH_BOUNDS = (-0.5, 1.0)
+
+# name -> model(inputs, params) returning fair value per share for every ticker
+MODELS = {}
+
+
+def register_model(name):
+    """Decorator adding a valuation model to MODELS"""
+    def decorator(model):
+        MODELS[name] = model
+        return model
+    return decorator
+
+
+def _column(inputs, name):
+    # Panels built from partial data may lack a column entirely
+    return inputs[name].to_numpy(dtype=float) if name in inputs else np.full(len(inputs), np.nan)
+
+
+@register_model('DCF')
+def dcf_model(inputs, params):
+    required_rate, perpetual_rate, cash_flow_growth_rate = params['rates']
+    return dcf_batch(
+        _column(inputs, 'Free Cash Flow'), _column(inputs, 'sharesOutstanding'),
+        required_rate, perpetual_rate, cash_flow_growth_rate,
+    )
+
+
+@register_model('Dividend Discount')
+def dividend_discount_model(inputs, params):
+    # Gordon growth: next year's dividend / (required - perpetual growth)
+    required_rate, perpetual_rate, _ = params['rates']
+    shares = _column(inputs, 'sharesOutstanding')
+    # Dividends paid are reported as a cash outflow (negative)
+    dividend_per_share = -_column(inputs, 'Cash Dividends Paid') / np.where(shares > 0, shares, np.nan)
+    fair_value = dividend_per_share * (1 + perpetual_rate) / (required_rate - perpetual_rate)
+    return np.where((dividend_per_share > 0) & (required_rate > perpetual_rate), fair_value, np.nan)
+
+
+@register_model('EV/EBITDA')
+def ev_ebitda_model(inputs, params):
+    shares = _column(inputs, 'sharesOutstanding')
+    net_debt = (
+        np.nan_to_num(_column(inputs, 'Total Debt'))
+        - np.nan_to_num(_column(inputs, 'Cash Cash Equivalents And Short Term Investments'))
+    )
+    equity_value = params['ev_ebitda_multiple'] * _column(inputs, 'EBITDA') - net_debt
+    return np.where(shares > 0, equity_value / np.where(shares > 0, shares, np.nan), np.nan)
+
+
+@register_model('P/E')
+def pe_model(inputs, params):
+    eps = _column(inputs, 'Basic EPS')
+    return np.where(eps > 0, params['pe_multiple'] * eps, np.nan)
+
+
+def implied_growth(inputs, rates, bounds=IMPLIED_GROWTH_BOUNDS, iterations=60):
+    """
+    Reverse DCF: cash flow growth rate that makes the DCF value equal the current price.
+
+    Solved for all tickers at once by bisection (the DCF value increases with growth when FCF > 0).
+
+    :return: Implied growth per ticker, NaN when FCF <= 0 or no rate within bounds matches the price.
+    """
+    required_rate, perpetual_rate, _ = rates
+    fcf = _column(inputs, 'Free Cash Flow')
+    shares = _column(inputs, 'sharesOutstanding')
+    price = _column(inputs, 'currentPrice')
+
+    def gap(growth):
+        return dcf_batch(fcf, shares, required_rate, perpetual_rate, growth) - price
+
+    low = np.full(len(inputs), bounds[0])
+    high = np.full(len(inputs), bounds[1])
+    solvable = (fcf > 0) & (price > 0) & (gap(low) <= 0) & (gap(high) >= 0)
+
+    for _ in range(iterations):
+        mid = (low + high) / 2
+        below = gap(mid) < 0
+        low = np.where(below, mid, low)
+        high = np.where(below, high, mid)
+
+    return np.where(solvable, (low + high) / 2, np.nan)
+
+
+def evaluate_models(inputs, rates=None, ev_ebitda_multiple=EV_EBITDA_MULTIPLE, pe_multiple=PE_MULTIPLE):
+    """
+    Run every registered model over a panel of tickers.
+
+    :param inputs: Panel from fundamentals_panel (ticker x field).
+    :param rates: Optional (required, perpetual, growth) rates as fractions; defaults to the sidebar values.
+    :return: DataFrame of ticker x (model fair values..., Implied Growth).
+    """
+    params = {
+        'rates': rates or dcf_rates(),
+        'ev_ebitda_multiple': ev_ebitda_multiple,
+        'pe_multiple': pe_multiple,
+    }
+    results = pd.DataFrame({name: model(inputs, params) for name, model in MODELS.items()}, index=inputs.index)
+    results['Implied Growth'] = implied_growth(inputs, params['rates'])
+    return results